@@ -151,6 +151,26 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(hour=2, minute=0), 
         "options": {"queue": "default"},
     },
+    "collect-media-blobs-daily": {
+        "task": "people.tasks.collect_media_blobs",
+        "schedule": crontab(hour=4, minute=15),
+        "options": {"queue": "default"},
+    },
+    "prune-derivative-cache-daily": {
+        "task": "people.tasks.prune_derivative_cache",
+        "schedule": crontab(hour=4, minute=30),
+        "options": {"queue": "default"},
+    },
+    "prune-upload-staging-daily": {
+        "task": "people.tasks.prune_upload_staging",
+        "schedule": crontab(hour=4, minute=45),
+        "options": {"queue": "default"},
+    },
+    "collect-photo-payloads-daily": {
+        "task": "people.tasks.collect_photo_payloads",
+        "schedule": crontab(hour=5, minute=0),
+        "options": {"queue": "default"},
+    },
 }
 
 CELERY_TASK_TRACK_STARTED = True
@@ -171,4 +191,29 @@ CACHES = {
         'KEY_PREFIX': 'atsameage',
         'TIMEOUT': 900,
     }
-}
\ No newline at end of file
+}
+# Number of Immich people synced in parallel
+IMMICH_SYNC_CONCURRENCY = int(os.environ.get("IMMICH_SYNC_CONCURRENCY", 4))
+
+# Shared HTTP client for Immich and PhotoPrism (people/upstream.py)
+UPSTREAM_POOL_SIZE = int(os.environ.get("UPSTREAM_POOL_SIZE", 10))
+UPSTREAM_MAX_RETRIES = int(os.environ.get("UPSTREAM_MAX_RETRIES", 3))
+UPSTREAM_BACKOFF_FACTOR = float(os.environ.get("UPSTREAM_BACKOFF_FACTOR", 0.5))
+UPSTREAM_TIMEOUT = int(os.environ.get("UPSTREAM_TIMEOUT", 30))
+
+# Disk budget of the resized photo cache under MEDIA_ROOT/derivatives
+DERIVATIVE_CACHE_MAX_BYTES = int(os.environ.get("DERIVATIVE_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+# PhotoPrism ingest: parallel marker lookups/downloads and requests per second
+PHOTOPRISM_CONCURRENCY = int(os.environ.get("PHOTOPRISM_CONCURRENCY", 4))
+PHOTOPRISM_RATE_LIMIT = float(os.environ.get("PHOTOPRISM_RATE_LIMIT", 10))
+# File details remembered per sync run; a TTL (seconds) also keeps them in Redis
+PHOTOPRISM_MARKER_CACHE_SIZE = int(os.environ.get("PHOTOPRISM_MARKER_CACHE_SIZE", 5000))
+PHOTOPRISM_MARKER_CACHE_TTL = int(os.environ.get("PHOTOPRISM_MARKER_CACHE_TTL", 0))
+
+# Bulk uploads: photos committed per transaction, and how long (seconds)
+# uncommitted sessions stay staged under MEDIA_ROOT/uploads
+UPLOAD_IMPORT_BATCH_SIZE = int(os.environ.get("UPLOAD_IMPORT_BATCH_SIZE", 100))
+UPLOAD_SESSION_MAX_AGE = int(os.environ.get("UPLOAD_SESSION_MAX_AGE", 7 * 24 * 3600))
+# Processes reading EXIF dates and sizes of uploads; 0 uses every core
+UPLOAD_EXIF_WORKERS = int(os.environ.get("UPLOAD_EXIF_WORKERS", 0))
@@ -2,6 +2,26 @@ import React, { useState, useEffect, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../api";
 
+const LANE_PAGE_SIZE = 24;
+
+// Add a page of lane months to the lanes loaded so far
+function mergeLanes(lanes, page) {
+  const byId = new Map(lanes.map(person => [person.person_id, person]));
+  page.forEach(person => {
+    const current = byId.get(person.person_id);
+    if (!current) {
+      byId.set(person.person_id, person);
+      return;
+    }
+    const known = new Set(current.agelane.map(p => p.age_in_months));
+    const agelane = current.agelane
+      .concat(person.agelane.filter(p => !known.has(p.age_in_months)))
+      .sort((a, b) => a.age_in_months - b.age_in_months);
+    byId.set(person.person_id, { ...current, agelane });
+  });
+  return Array.from(byId.values());
+}
+
 export default function PeopleSameAgeLane() {
   const API_URL = process.env.REACT_APP_API_URL || "http://localhost:8018/api";
 
@@ -24,15 +44,33 @@ export default function PeopleSameAgeLane() {
   }, [selected]);
 
   useEffect(() => {
+    let cancelled = false;
+
+    function addMonths(lanes) {
+      setAllMonths(prev => {
+        const allSet = new Set(prev);
+        lanes.forEach(person => {
+          person.agelane.forEach(p => allSet.add(p.age_in_months));
+        });
+        return Array.from(allSet).sort((a, b) => a - b);
+      });
+    }
+
+    // Fetch the remaining months page by page after the first paint
+    async function loadRest(cursor) {
+      while (cursor !== null && !cancelled) {
+        const res = await api.get(`/sameagelane/?cursor=${cursor}&limit=${LANE_PAGE_SIZE}`);
+        if (cancelled) return;
+        setLaneData(prev => mergeLanes(prev, res.data.results));
+        addMonths(res.data.results);
+        cursor = res.data.next_cursor;
+      }
+    }
+
     async function load() {
       try {
-        const [peopleRes, laneRes] = await Promise.all([
-          api.get("/people/"),
-          api.get("/sameagelane/")
-        ]);
-
+        const peopleRes = await api.get("/people/");
         setPeople(peopleRes.data);
-        setLaneData(laneRes.data);
 
         // set selected persons
         const saved = localStorage.getItem('selectedPeople');
@@ -46,45 +84,50 @@ export default function PeopleSameAgeLane() {
 
         setSelected(defaults);
 
-
-        // collect all months
-        const allSet = new Set();
-        laneRes.data.forEach(person => {
-          person.agelane.forEach(p => allSet.add(p.age_in_months));
-        });
-        const sortedMonths = Array.from(allSet).sort((a, b) => a - b);
-        setAllMonths(sortedMonths);
+        if (peopleRes.data.length === 0) return;
 
         // Calculate age youngest person
-        if (laneRes.data.length > 0) {
-          const today = new Date();
-          let youngest = laneRes.data[0];
-          laneRes.data.forEach(p => {
-            if (new Date(p.birth_date) > new Date(youngest.birth_date)) youngest = p;
-          });
-          const birth = new Date(youngest.birth_date);
-          let years = today.getFullYear() - birth.getFullYear();
-          let months = today.getMonth() - birth.getMonth();
-          if (months < 0) {
-            years -= 1;
-            months += 12;
-          }
-          setAgeYears(years);
-          setAgeMonths(months);
-
-          const youngestMonths = youngest.agelane
-            .map(p => p.age_in_months)
-            .sort((a, b) => b - a)
-            .slice(0, 4);
-          setVisibleMonths(youngestMonths);
+        const today = new Date();
+        let youngest = peopleRes.data[0];
+        peopleRes.data.forEach(p => {
+          if (new Date(p.birth_date) > new Date(youngest.birth_date)) youngest = p;
+        });
+        const birth = new Date(youngest.birth_date);
+        let years = today.getFullYear() - birth.getFullYear();
+        let months = today.getMonth() - birth.getMonth();
+        if (months < 0) {
+          years -= 1;
+          months += 12;
         }
+        setAgeYears(years);
+        setAgeMonths(months);
+
+        // First paint only needs the months around the youngest's age
+        const toMonth = years * 12 + months;
+        const fromMonth = Math.max(0, toMonth - LANE_PAGE_SIZE + 1);
+        const laneRes = await api.get(`/sameagelane/?from_month=${fromMonth}&to_month=${toMonth}`);
+        if (cancelled) return;
+
+        setLaneData(laneRes.data.results);
+        addMonths(laneRes.data.results);
+
+        const youngestLane = laneRes.data.results.find(p => p.person_id === youngest.id);
+        const youngestMonths = (youngestLane ? youngestLane.agelane : [])
+          .map(p => p.age_in_months)
+          .sort((a, b) => b - a)
+          .slice(0, 4);
+        setVisibleMonths(youngestMonths);
+        setLoading(false);
+
+        await loadRest(0);
       } catch (err) {
         console.error(err);
       } finally {
-        setLoading(false);
+        if (!cancelled) setLoading(false);
       }
     }
     load();
+    return () => { cancelled = true; };
   }, []);
 
   const getBirthdayEmoji = (birthDate) => {
@@ -258,7 +301,7 @@ export default function PeopleSameAgeLane() {
                   <div key={month} style={{ display: "flex", flexDirection: "column", alignItems: "center" }}>
                     {photoObj ? (
                       <img
-                        src={`${API_URL}/photos/proxy/${photoObj.photo.id}/`}
+                        src={`${API_URL}/photos/proxy/${photoObj.photo.id}/?size=thumb`}
                         alt={`Month ${month}`}
                         style={{
                           width: "150px",
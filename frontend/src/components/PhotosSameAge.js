@@ -24,27 +24,8 @@ function PhotosSameAgePage({ ageMonths, people }) {
 <div style={{ padding: "20px" }}>
   <h2>Photos at {ageMonths} months</h2>
   {photos.map((photo) => {
-    const box = photo.person_face_box;
     const cropSize = 200;
 
-    const boxWidth = box ? box.boundingBoxX2 - box.boundingBoxX1 : 1;
-    const boxHeight = box ? box.boundingBoxY2 - box.boundingBoxY1 : 1;
-
-    const imgWidth = box ? box.imageWidth : 1;
-    const imgHeight = box ? box.imageHeight : 1;
-
-    const scaleX = cropSize / boxWidth;
-    const scaleY = cropSize / boxHeight;
-    const scale = Math.min(scaleX, scaleY);
-
-    const boxCenterX = box ? box.boundingBoxX1 + boxWidth / 2 : 0;
-    const boxCenterY = box ? box.boundingBoxY1 + boxHeight / 2 : 0;
-    const targetX = cropSize / 2;
-    const targetY = cropSize / 2;
-
-    const offsetX = box ? targetX / scale - boxCenterX : 0;
-    const offsetY = box ? targetY / scale - boxCenterY : 0;
-
     return (
       <div key={photo.id} style={{ marginBottom: "1rem" }}>
         <div
@@ -65,15 +46,13 @@ function PhotosSameAgePage({ ageMonths, people }) {
           }
         >
           <img
-            src={`${API_URL}/photos/proxy/${photo.id}/`}
+            src={`${API_URL}/photos/proxy/${photo.id}/?crop=face&size=tile`}
             alt={photo.person_name || "Person"}
             style={{
               display: "block",
-              width: `${imgWidth}px`, 
-              height: `${imgHeight}px`, 
-              transform: `scale(${scale}) translate(${offsetX}px, ${offsetY}px)`,
-              transformOrigin: "top left",
-              transition: "transform 0.5s ease",
+              width: `${cropSize}px`,
+              height: `${cropSize}px`,
+              objectFit: "cover",
             }}
             className="photo-crop"
           />
@@ -1,14 +1,18 @@
 import React, { useState, useEffect } from 'react';
 import api from "../api";
 
+// Frames fetched per playlist call, and how many must be ready ahead
+const PLAYLIST_FRAMES = 6;
+const PREFETCH_FRAMES = 3;
+
 export default function SlideShow() {
-  const [data, setData] = useState([]);
+  const [peopleParam, setPeopleParam] = useState('');
+  const [monthPhotos, setMonthPhotos] = useState({});
   const [loading, setLoading] = useState(true);
   const [validMonths, setValidMonths] = useState([]);
   const [currentIndex, setCurrentIndex] = useState(0);
   const [isPaused, setIsPaused] = useState(false);
   const [selected, setSelected] = useState({});
-  const API_URL = process.env.REACT_APP_API_URL || "http://localhost:8018/api";
 
   useEffect(() => {
     if (Object.keys(selected).length === 0) return;
@@ -26,18 +30,15 @@ export default function SlideShow() {
           const ids = Object.keys(selected).filter(id => selected[id]).join(',');
           peopleParam = ids;
         }
+        setPeopleParam(peopleParam);
 
+        // The server intersects per-person month bitmaps for us
         const url = peopleParam 
-          ? `/sameagelane/?people=${peopleParam}`
-          : `/sameagelane/`;
+          ? `/sameagelane/common-months/?people=${peopleParam}`
+          : `/sameagelane/common-months/`;
         
         const res = await api.get(url);
-        setData(res.data);
-        
-        if (res.data.length > 0) {
-          const months = findValidMonths(res.data);
-          setValidMonths(months);
-        }
+        setValidMonths(res.data.months);
       } catch (err) {
         console.error(err);
       } finally {
@@ -47,36 +48,37 @@ export default function SlideShow() {
     load();
   }, []);
 
-  const findValidMonths = (persons) => {
-    if (persons.length === 0) return [];
-    
-    const personMonths = persons.map(person => 
-      new Set(person.agelane.map(entry => entry.age_in_months))
-    );
-    
-    const maxMonth = Math.max(
-      ...persons.flatMap(p => p.agelane.map(e => e.age_in_months))
-    );
-    
-    const valid = [];
-    for (let month = 0; month <= maxMonth; month++) {
-      if (personMonths.every(set => set.has(month))) {
-        valid.push(month);
-      }
-    }
-    
-    return valid;
-  };
+  const currentMonth = validMonths[currentIndex];
+
+  // Keep the upcoming frames loaded: fetch the next playlist batch, let the
+  // server warm its derivatives and preload the images into the browser cache
+  useEffect(() => {
+    if (currentMonth === undefined) return;
+    const ahead = validMonths.slice(currentIndex, currentIndex + PREFETCH_FRAMES);
+    if (ahead.every(month => monthPhotos[month])) return;
+
+    const people = peopleParam ? `&people=${peopleParam}` : '';
+    api.get(`/slideshow/playlist/?from_month=${currentMonth}&count=${PLAYLIST_FRAMES}&size=screen&warm=1${people}`)
+      .then(res => {
+        const frames = {};
+        res.data.frames.forEach(frame => {
+          frames[frame.age_in_months] = frame.photos;
+          frame.photos.forEach(photo => {
+            const img = new Image();
+            img.src = photo.url;
+          });
+        });
+        setMonthPhotos(prev => ({ ...prev, ...frames }));
+      })
+      .catch(err => console.error(err));
+  }, [currentMonth, currentIndex, validMonths, peopleParam, monthPhotos]);
 
   const getPhotosForMonth = (month) => {
-    return data.map(person => {
-      const entry = person.agelane.find(e => e.age_in_months === month);
-      return {
-        person: person.person,
-        photo: entry?.photo,
-        personId: person.person_id
-      };
-    }).filter(item => item.photo);
+    return (monthPhotos[month] || []).map(entry => ({
+      person: entry.person,
+      url: entry.url,
+      personId: entry.person_id
+    }));
   };
 
   useEffect(() => {
@@ -121,7 +123,6 @@ export default function SlideShow() {
     );
   }
 
-  const currentMonth = validMonths[currentIndex];
   const currentPhotos = getPhotosForMonth(currentMonth);
   const years = Math.floor(currentMonth / 12);
   const months = currentMonth % 12;
@@ -148,7 +149,7 @@ export default function SlideShow() {
             }}
           >
             <img
-              src={`${API_URL}/photos/proxy/${item.photo.id}/`}
+              src={item.url}
               alt={`${item.person} - ${currentMonth} months`}
               style={{ width: '100%', height: '100%', objectFit: 'cover' }}
             />
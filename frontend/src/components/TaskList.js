@@ -159,6 +159,69 @@ export default function TaskList() {
     }
   }
 
+  const UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024;
+
+  async function uploadFileInChunks(sessionId, file, alreadyReceived) {
+    let offset = alreadyReceived;
+    while (offset < file.size) {
+      const formData = new FormData();
+      formData.append('filename', file.name);
+      formData.append('offset', offset);
+      formData.append('total', file.size);
+      formData.append('chunk', file.slice(offset, offset + UPLOAD_CHUNK_SIZE), file.name);
+
+      const res = await fetch(`${API_URL}/upload-sessions/${sessionId}/`, {
+        method: "POST",
+        body: formData,
+      });
+      const data = await res.json();
+      if (!res.ok && res.status !== 409) {
+        throw new Error(data.error || `Upload of ${file.name} failed`);
+      }
+      // 409 tells us where the server is; resume from there
+      offset = data.received;
+      if (data.complete) break;
+    }
+  }
+
+  function pollUploadImport(taskId) {
+    const interval = setInterval(async () => {
+      try {
+        const statusRes = await fetch(`${API_URL}/tasks/status/${taskId}/`);
+        const statusData = await statusRes.json();
+        const stats = statusData.info || {};
+
+        if (statusData.status === "PROGRESS") {
+          setUploadStatus({
+            success: true,
+            message: `Importing... ${stats.done} of ${stats.total} items, ${stats.photos_created} photos created`,
+          });
+        } else if (statusData.status === "SUCCESS") {
+          clearInterval(interval);
+          setIsUploading(false);
+          setUploadStatus({
+            success: true,
+            message: `Successfully imported: ${stats.persons_created} new persons, ${stats.persons_updated || 0} existing persons, ${stats.photos_created} photos created${stats.photos_skipped ? `, ${stats.photos_skipped} photos skipped (already exist)` : ''}`,
+            errors: stats.errors,
+          });
+          setJsonFile(null);
+          setPhotoFiles([]);
+        } else if (statusData.status === "FAILURE") {
+          clearInterval(interval);
+          setIsUploading(false);
+          setUploadStatus({
+            success: false,
+            message: `Import failed: ${statusData.info}`,
+          });
+        }
+      } catch (err) {
+        console.error("Failed to fetch import status:", err);
+        clearInterval(interval);
+        setIsUploading(false);
+      }
+    }, 2000);
+  }
+
   async function handleUploadSubmit() {
     if (!jsonFile) {
       alert("Please select a JSON file");
@@ -171,45 +234,40 @@ export default function TaskList() {
     try {
       const formData = new FormData();
       formData.append('json', jsonFile);
-      
-      for (const file of photoFiles) {
-        formData.append('photos', file, file.name);
-      }
 
-      const res = await fetch(`${API_URL}/upload-json/`, {
+      const res = await fetch(`${API_URL}/upload-sessions/`, {
         method: "POST",
         body: formData,
       });
+      const session = await res.json();
+      if (!res.ok) {
+        throw new Error(session.error || "Upload failed");
+      }
 
-      const data = await res.json();
-
-      if (res.ok) {
-        const msg = `Successfully imported: ${data.stats.persons_created} new persons, ${data.stats.persons_updated || 0} existing persons, ${data.stats.photos_created} photos created${data.stats.photos_skipped ? `, ${data.stats.photos_skipped} photos skipped (already exist)` : ''}`;
+      const expected = new Set(session.files);
+      const files = photoFiles.filter(file => expected.has(file.name));
+      for (const [idx, file] of files.entries()) {
         setUploadStatus({
           success: true,
-          message: msg,
-          errors: data.stats.errors,
-        });
-        
-        setJsonFile(null);
-        setPhotoFiles([]);
-        
-        setTimeout(() => {
-          setUploadStatus(null);
-        }, 5000);
-      } else {
-        setUploadStatus({
-          success: false,
-          message: data.error || "Upload failed",
+          message: `Uploading ${idx + 1} of ${files.length}: ${file.name}`,
         });
+        await uploadFileInChunks(session.session_id, file, 0);
+      }
+
+      const commitRes = await fetch(`${API_URL}/upload-sessions/${session.session_id}/commit/`, {
+        method: "POST",
+      });
+      const commit = await commitRes.json();
+      if (!commitRes.ok) {
+        throw new Error(commit.error || "Import could not be started");
       }
+      pollUploadImport(commit.task_id);
     } catch (err) {
       console.error("Upload failed:", err);
       setUploadStatus({
         success: false,
-        message: "Network error during upload",
+        message: err.message || "Network error during upload",
       });
-    } finally {
       setIsUploading(false);
     }
   }
@@ -1,6 +1,6 @@
 # people/admin.py
 from django.contrib import admin
-from .models import Person, Photo
+from .models import MediaBlob, Person, Photo, SyncState
 
 @admin.register(Person)
 class PersonAdmin(admin.ModelAdmin):
@@ -13,3 +13,15 @@ class PhotoAdmin(admin.ModelAdmin):
     list_display = ("person", "photo_date", "source", "source_id")
     search_fields = ("person__name", "source_id")
     list_filter = ("photo_date", "source")
+
+
+@admin.register(SyncState)
+class SyncStateAdmin(admin.ModelAdmin):
+    list_display = ("person", "source", "watermark", "last_synced_at")
+    list_filter = ("source",)
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ("key", "file", "size", "created_at")
+    search_fields = ("key",)
@@ -0,0 +1,158 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Min
+
+from .models import AgeLaneEntry, Photo
+from .utils import age_at_photo, on_commit_once
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# person_id -> months waiting for the current transaction to commit
+_pending = threading.local()
+
+
+def refresh_age_lane(person_id, months=None):
+    """
+    Recompute the lane entries of one person, or only those of `months`.
+    The representative photo of a month is its oldest row, as the lane
+    always showed.
+    Returns number of entries written
+    """
+    if months is not None:
+        months = {month for month in months if month is not None and month >= 0}
+        if not months:
+            return 0
+
+    photos = Photo.objects.filter(person_id=person_id, age_at_photo_months__gte=0)
+    stale = AgeLaneEntry.objects.filter(person_id=person_id)
+    if months is not None:
+        photos = photos.filter(age_at_photo_months__in=months)
+        stale = stale.filter(age_in_months__in=months)
+
+    picks = dict(
+        photos.values('age_at_photo_months')
+        .annotate(photo_id=Min('id'))
+        .values_list('age_at_photo_months', 'photo_id')
+    )
+
+    with transaction.atomic():
+        stale.exclude(age_in_months__in=list(picks)).delete()
+        # An upsert, so concurrent refreshes of the same month cannot
+        # collide on the unique constraint
+        entries = AgeLaneEntry.objects.bulk_create(
+            [
+                AgeLaneEntry(person_id=person_id, age_in_months=month, photo_id=photo_id)
+                for month, photo_id in picks.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['person', 'age_in_months'],
+            update_fields=['photo'],
+        )
+    return len(entries)
+
+
+def pending_lane_months():
+    if not hasattr(_pending, 'months'):
+        _pending.months = {}
+    return _pending.months
+
+
+def queue_lane_refresh(person_id, months):
+    """
+    Refresh lane months of a person once the transaction commits. Months
+    queued many times in one transaction, e.g. by a cascade delete, are
+    refreshed once.
+    """
+    months = {month for month in months if month is not None and month >= 0}
+    if person_id is None or not months:
+        return
+    pending_lane_months().setdefault(person_id, set()).update(months)
+    on_commit_once(flush_lane_refreshes)
+
+
+def flush_lane_refreshes():
+    pending = pending_lane_months()
+    while pending:
+        person_id, months = pending.popitem()
+        refresh_age_lane(person_id, months)
+
+
+def recompute_photo_ages(person):
+    """
+    Recalculate the stored ages of all dated photos of a person after the
+    birth date changed, then rebuild their lane.
+    Returns number of photos updated
+    """
+    photos = list(
+        person.photos.filter(photo_date__isnull=False)
+        .only('id', 'source', 'photo_date', 'age_at_photo_years', 'age_at_photo_months')
+    )
+    for photo in photos:
+        photo.age_at_photo_years, photo.age_at_photo_months = age_at_photo(
+            person.birth_date, photo.photo_date, calendar=photo.source == 'own_json'
+        )
+
+    Photo.objects.bulk_update(photos, ['age_at_photo_years', 'age_at_photo_months'], batch_size=500)
+    refresh_age_lane(person.id)
+    logger.info(f"Recomputed ages of {len(photos)} photos for {person.name}")
+    return len(photos)
+
+
+LANE_PHOTO_FIELDS = (
+    'photo__id', 'photo__remote_url', 'photo__source', 'photo__source_id',
+    'photo__person_face_box',
+)
+
+
+def lane_photo(photo):
+    return {
+        "id": photo.id,
+        "url": photo.remote_url or "",
+        "source": photo.source,
+        "source_id": photo.source_id,
+        "person_face_box": photo.person_face_box
+    }
+
+
+def lane_entries(person_ids, from_month=None, to_month=None):
+    entries = AgeLaneEntry.objects.filter(person_id__in=person_ids)
+    if from_month is not None:
+        entries = entries.filter(age_in_months__gte=from_month)
+    if to_month is not None:
+        entries = entries.filter(age_in_months__lte=to_month)
+    return entries
+
+
+def age_lanes(person_ids, from_month=None, to_month=None):
+    """
+    Lane entries of several persons in one indexed range read, ordered by
+    age, optionally limited to the months from_month..to_month.
+    Returns dict: person_id -> list of lane months
+    """
+    entries = (
+        lane_entries(person_ids, from_month, to_month)
+        .select_related('photo')
+        .only('person_id', 'age_in_months', *LANE_PHOTO_FIELDS)
+        .order_by('person_id', 'age_in_months')
+    )
+
+    lanes = {person_id: [] for person_id in person_ids}
+    for entry in entries:
+        lanes[entry.person_id].append({
+            "age_in_months": entry.age_in_months,
+            "photo": lane_photo(entry.photo)
+        })
+    return lanes
+
+
+def next_lane_month(person_ids, from_month, to_month=None):
+    """
+    First month at or after `from_month` any of the persons has a photo
+    for, so paging skips empty stretches. None when nothing is left.
+    """
+    return lane_entries(person_ids, from_month, to_month).aggregate(
+        month=Min('age_in_months')
+    )['month']
@@ -5,6 +5,8 @@ class PeopleConfig(AppConfig):
     name = 'people'
 
     def ready(self):
+        from . import signals  # noqa: F401
+
         # Import local
         from django_celery_beat.models import PeriodicTask, CrontabSchedule
         import json
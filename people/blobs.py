@@ -0,0 +1,93 @@
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import MediaBlob
+
+logger = logging.getLogger(__name__)
+
+# Blobs stored or reused more recently than this are never collected, so an
+# ingest that has the blob but has not saved its Photo yet does not lose it.
+BLOB_GC_GRACE = timedelta(hours=1)
+# Reused blobs seen more recently than this are not touched again
+BLOB_TOUCH_INTERVAL = BLOB_GC_GRACE / 2
+
+
+def blob_path(key, extension):
+    return f"blobs/{key[:2]}/{key}.{extension.lower()}"
+
+
+def file_sha256(f):
+    digest = hashlib.sha256()
+    for chunk in f.chunks():
+        digest.update(chunk)
+    f.seek(0)
+    return digest.hexdigest()
+
+
+def store_blob(key, content, extension="jpg"):
+    """
+    Return the blob for `key`, writing `content` only when no blob with
+    that key exists yet. `content` is bytes, a Django File, or a callable
+    returning either, called only when the content has to be written; e.g.
+    when a blob seen earlier was collected in the meantime.
+    Returns tuple: (blob, created)
+    """
+    # Touch a reused blob before reading it, so the collector leaves it
+    # alone until the Photo pointing at it is saved. The update waits for a
+    # collector holding the row, and a blob it deleted is written anew.
+    now = timezone.now()
+    MediaBlob.objects.filter(key=key, last_seen__lt=now - BLOB_TOUCH_INTERVAL).update(last_seen=now)
+    blob = MediaBlob.objects.filter(key=key).first()
+    if blob:
+        return blob, False
+
+    if callable(content):
+        content = content()
+    if isinstance(content, bytes):
+        content = ContentFile(content)
+    name = default_storage.save(blob_path(key, extension), content)
+
+    try:
+        with transaction.atomic():
+            blob = MediaBlob.objects.create(key=key, file=name, size=default_storage.size(name))
+    except IntegrityError:
+        # Another worker stored the same content first
+        default_storage.delete(name)
+        return MediaBlob.objects.get(key=key), False
+
+    return blob, True
+
+
+def attach_blob(photo, blob):
+    photo.blob = blob
+    photo.file_path.name = blob.file.name
+
+
+def collect_orphan_blobs():
+    """
+    Delete blobs no Photo refers to any more, together with their files.
+    Returns tuple: (blobs removed, bytes freed)
+    """
+    cutoff = timezone.now() - BLOB_GC_GRACE
+    with transaction.atomic():
+        # Locked, so an ingest reusing one of them waits until they are gone
+        orphans = list(
+            MediaBlob.objects.select_for_update(of=('self',))
+            .filter(photos__isnull=True, last_seen__lt=cutoff)
+        )
+        MediaBlob.objects.filter(id__in=[blob.id for blob in orphans]).delete()
+
+    # Files go only once the rows are gone for good
+    for blob in orphans:
+        default_storage.delete(blob.file.name)
+    removed = len(orphans)
+    freed = sum(blob.size for blob in orphans)
+
+    logger.info(f"Collected {removed} orphan blobs, {freed} bytes freed")
+    return removed, freed
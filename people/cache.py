@@ -0,0 +1,76 @@
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_KEY = "data_version"
+RESPONSE_CACHE_TIMEOUT = 60 * 15
+
+
+def get_data_version():
+    """
+    Counter that changes whenever people or photos change.
+    It starts from the current time so a flushed cache never hands out a
+    version that was used before.
+    """
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, int(time.time()), None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    try:
+        return cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        cache.add(DATA_VERSION_KEY, int(time.time()), None)
+        return cache.get(DATA_VERSION_KEY)
+
+
+def data_version_etag(request, *args, **kwargs):
+    return f"v{get_data_version()}"
+
+
+def dated_data_version_etag(request, *args, **kwargs):
+    """
+    ETag for responses that also depend on today's date, such as a
+    person's age in days.
+    """
+    return f"v{get_data_version()}-{timezone.now().date().isoformat()}"
+
+
+def versioned_cache_key(name, *parts):
+    """
+    Cache key that includes the data version, so entries written before a
+    change are simply never read again and expire on their own.
+    """
+    suffix = "_".join(str(part) for part in parts)
+    return f"{name}_v{get_data_version()}_{suffix}"
+
+
+def cached_by_data_version(name, parts, build, timeout=RESPONSE_CACHE_TIMEOUT):
+    """
+    Return the cached value for `name` and `parts` at the current data
+    version, calling `build()` to fill it on a miss.
+    """
+    key = versioned_cache_key(name, *parts)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout)
+    return data
+
+
+def data_changed():
+    """
+    Call after any write to people or photos. Bumping the version is a
+    single INCR; stale responses are left to expire. Inside a transaction
+    the bump waits for the commit so no reader caches uncommitted state
+    under the new version.
+    """
+    transaction.on_commit(bump_data_version)
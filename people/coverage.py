@@ -0,0 +1,101 @@
+from django.core.cache import cache
+
+from .agelane import LANE_PHOTO_FIELDS, lane_photo
+from .cache import versioned_cache_key
+from .models import AgeLaneEntry
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Bitmaps are keyed by the data version, so they only go stale by expiring
+COVERAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def months_to_bitmap(months):
+    bitmap = 0
+    for month in months:
+        bitmap |= 1 << month
+    return bitmap
+
+
+def bitmap_to_months(bitmap):
+    months = []
+    month = 0
+    while bitmap:
+        if bitmap & 1:
+            months.append(month)
+        bitmap >>= 1
+        month += 1
+    return months
+
+
+def coverage_bitmaps(person_ids):
+    """
+    Months with a photo per person as an int with one bit per month of
+    age. Cached per person; the misses are built with one indexed read
+    of the age lane.
+    Returns dict: person_id -> bitmap
+    """
+    keys = {person_id: versioned_cache_key("coverage", person_id) for person_id in person_ids}
+    cached = cache.get_many(list(keys.values()))
+    bitmaps = {
+        person_id: cached[key] for person_id, key in keys.items() if key in cached
+    }
+
+    missing = [person_id for person_id in person_ids if person_id not in bitmaps]
+    if missing:
+        months = {person_id: [] for person_id in missing}
+        entries = AgeLaneEntry.objects.filter(person_id__in=missing).values_list('person_id', 'age_in_months')
+        for person_id, month in entries:
+            months[person_id].append(month)
+
+        built = {person_id: months_to_bitmap(person_months) for person_id, person_months in months.items()}
+        cache.set_many({keys[person_id]: bitmap for person_id, bitmap in built.items()}, COVERAGE_CACHE_TIMEOUT)
+        bitmaps.update(built)
+    return bitmaps
+
+
+def common_months(person_ids):
+    """
+    Months of age in which every one of the persons has a photo.
+    """
+    if not person_ids:
+        return []
+
+    bitmaps = coverage_bitmaps(person_ids)
+    common = -1
+    for bitmap in bitmaps.values():
+        common &= bitmap
+    return bitmap_to_months(common)
+
+
+def month_photos(person_ids, month):
+    """
+    Lane photo of each of the persons for one month, youngest person first
+    like the lane.
+    """
+    return month_photo_sets(person_ids, [month])[month]
+
+
+def month_photo_sets(person_ids, months):
+    """
+    Like month_photos for several months in one query.
+    Returns dict: month -> list of lane photos per person
+    """
+    entries = (
+        AgeLaneEntry.objects.filter(person_id__in=person_ids, age_in_months__in=months)
+        .select_related('person', 'photo')
+        .only('person__id', 'person__name', 'person__birth_date', 'age_in_months', *LANE_PHOTO_FIELDS)
+        .order_by('age_in_months', '-person__birth_date')
+    )
+    sets = {month: [] for month in months}
+    for entry in entries:
+        sets[entry.age_in_months].append({
+            "person_id": entry.person.id,
+            "person": entry.person.name,
+            "age_in_months": entry.age_in_months,
+            "photo": lane_photo(entry.photo),
+        })
+    return sets
@@ -0,0 +1,352 @@
+"""
+On-disk cache of resized photos served by photo_proxy, keyed by source and
+source_id under MEDIA_ROOT/derivatives and evicted least recently used.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from . import upstream
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels
+DERIVATIVE_PRESETS = {
+    "thumb": 256,
+    "tile": 512,
+    "screen": 1440,
+}
+
+# Face crops are precomputed at ingest for these presets
+FACE_CROP_PRESETS = ("thumb", "tile")
+
+# How much wider than the face itself the square crop is
+FACE_CROP_MARGIN = 2.5
+
+DERIVATIVE_FORMATS = {
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "webp": ("WEBP", "webp", "image/webp"),
+}
+
+CACHE_SIZE_KEY = "derivative_cache_bytes"
+PRUNE_LOCK_KEY = "derivative_cache_pruning"
+
+
+def derivative_root():
+    return default_storage.path("derivatives")
+
+
+def derivative_dir(photo):
+    source_id = re.sub(r"[^A-Za-z0-9_.-]", "_", photo.source_id or str(photo.id))
+    return os.path.join(
+        derivative_root(),
+        photo.source or "unknown",
+        source_id[-2:],
+        source_id,
+    )
+
+
+def derivative_path(photo, preset, fmt):
+    _, extension, _ = DERIVATIVE_FORMATS[fmt]
+    return os.path.join(derivative_dir(photo), f"{preset}.{extension}")
+
+
+def face_crop_key(photo):
+    """
+    Identifies the face a crop was made from; part of the file name so a
+    changed face box never serves a stale crop.
+    """
+    box = json.dumps(photo.person_face_box, sort_keys=True)
+    return hashlib.sha1(f"{photo.person_id}:{box}".encode()).hexdigest()[:10]
+
+
+def face_crop_path(photo, preset, fmt):
+    _, extension, _ = DERIVATIVE_FORMATS[fmt]
+    return os.path.join(
+        derivative_dir(photo),
+        f"face-{photo.person_id}-{face_crop_key(photo)}-{preset}.{extension}",
+    )
+
+
+def open_source_image(photo):
+    """
+    Open the image a derivative is built from.
+    Local files are used as they are. For Immich the preview rendition is
+    fetched, since Pillow cannot decode every original format (HEIC, RAW)
+    and the preview is already as large as the largest preset.
+    """
+    if photo.file_path:
+        with photo.file_path.open("rb") as f:
+            return Image.open(BytesIO(f.read()))
+
+    url = f"{settings.IMMICH_API_URL}/assets/{photo.source_id}/thumbnail"
+    response = upstream.get(
+        url,
+        params={"size": "preview"},
+        headers={"x-api-key": f"{settings.IMMICH_API_KEY}"},
+    )
+    response.raise_for_status()
+    return Image.open(BytesIO(response.content))
+
+
+def prepare_image(image):
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return image
+
+
+def encode_image(image, longest_edge, fmt):
+    pil_format, _, _ = DERIVATIVE_FORMATS[fmt]
+    image = image.copy()
+    image.thumbnail((longest_edge, longest_edge), Image.LANCZOS)
+
+    output = BytesIO()
+    image.save(output, pil_format, quality=85)
+    return output.getvalue()
+
+
+def render_derivative(image, preset, fmt):
+    return encode_image(prepare_image(image), DERIVATIVE_PRESETS[preset], fmt)
+
+
+def normalize_face_box(box, image_size):
+    """
+    Face box as fractions of the image: (left, top, right, bottom).
+    Understands the Immich face format (also stored for PhotoPrism photos),
+    raw PhotoPrism markers (X/Y/W/H as fractions) and the [x, y, w, h]
+    pixel list of JSON uploads. Returns None when there is no usable box.
+    """
+    width, height = image_size
+    try:
+        if isinstance(box, dict) and box.get("imageWidth") and box.get("imageHeight"):
+            box_width, box_height = box["imageWidth"], box["imageHeight"]
+            left = box["boundingBoxX1"] / box_width
+            top = box["boundingBoxY1"] / box_height
+            right = box["boundingBoxX2"] / box_width
+            bottom = box["boundingBoxY2"] / box_height
+        elif isinstance(box, dict) and "W" in box and "H" in box:
+            left, top = box.get("X", 0), box.get("Y", 0)
+            right, bottom = left + box["W"], top + box["H"]
+        elif isinstance(box, (list, tuple)) and len(box) == 4:
+            x, y, box_width, box_height = box
+            left, top = x / width, y / height
+            right, bottom = (x + box_width) / width, (y + box_height) / height
+        else:
+            return None
+    except (KeyError, TypeError, ZeroDivisionError):
+        return None
+
+    left, top = max(left, 0.0), max(top, 0.0)
+    right, bottom = min(right, 1.0), min(bottom, 1.0)
+    if right <= left or bottom <= top:
+        return None
+    return left, top, right, bottom
+
+
+def has_face_box(box):
+    """
+    Whether `box` can yield a face before the image is fetched. Pixel
+    boxes of JSON uploads need the image size, so for them only a positive
+    size is checked here and the rest once the image is open.
+    """
+    if isinstance(box, (list, tuple)) and len(box) == 4:
+        try:
+            return box[2] > 0 and box[3] > 0
+        except TypeError:
+            return False
+    return normalize_face_box(box, (1, 1)) is not None
+
+
+def face_crop_region(face, image_size):
+    """
+    Square region centred on the face, FACE_CROP_MARGIN times the face size
+    and shifted to stay inside the image.
+    """
+    width, height = image_size
+    left, top, right, bottom = face
+    left, right = left * width, right * width
+    top, bottom = top * height, bottom * height
+
+    side = min(max(right - left, bottom - top) * FACE_CROP_MARGIN, width, height)
+    x = min(max((left + right) / 2 - side / 2, 0), width - side)
+    y = min(max((top + bottom) / 2 - side / 2, 0), height - side)
+    return round(x), round(y), round(x + side), round(y + side)
+
+
+def render_face_crop(image, face_box, preset, fmt):
+    """Raises ValueError when the face box cannot be used."""
+    image = prepare_image(image)
+    face = normalize_face_box(face_box, image.size)
+    if face is None:
+        raise ValueError("No usable face box")
+    crop = image.crop(face_crop_region(face, image.size))
+    return encode_image(crop, DERIVATIVE_PRESETS[preset], fmt)
+
+
+def write_atomically(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def get_cached_file(path, build):
+    """
+    Return tuple: (open file, created); `build` produces the bytes on a miss.
+    The file is opened here, so a prune removing it afterwards does not
+    affect the response.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        content = build()
+        write_atomically(path, content)
+        track_cache_growth(len(content))
+        return BytesIO(content), True
+
+    try:
+        # Touch it so eviction sees it as recently used
+        os.utime(path)
+    except OSError:
+        pass
+    return f, False
+
+
+def get_derivative(photo, preset, fmt="jpeg"):
+    """
+    Open the derivative, building it on the first request.
+    Returns tuple: (file object, created)
+    """
+    return get_cached_file(
+        derivative_path(photo, preset, fmt),
+        lambda: render_derivative(open_source_image(photo), preset, fmt),
+    )
+
+
+def get_face_crop(photo, preset, fmt="jpeg"):
+    """
+    Like get_derivative, for the face-centred crop of the photo's person.
+    Raises ValueError when the photo has no usable face box, without
+    fetching the source image when that is clear from the box alone.
+    """
+    if not has_face_box(photo.person_face_box):
+        raise ValueError("No usable face box")
+    return get_cached_file(
+        face_crop_path(photo, preset, fmt),
+        lambda: render_face_crop(open_source_image(photo), photo.person_face_box, preset, fmt),
+    )
+
+
+def precompute_face_crops(photo):
+    """
+    Write every FACE_CROP_PRESETS crop of the photo in all formats, fetching
+    the source image at most once. Returns the number of files written.
+    Raises ValueError when the photo has no usable face box.
+    """
+    if not has_face_box(photo.person_face_box):
+        raise ValueError("No usable face box")
+    image = None
+    written = 0
+    for preset in FACE_CROP_PRESETS:
+        for fmt in DERIVATIVE_FORMATS:
+            path = face_crop_path(photo, preset, fmt)
+            if os.path.exists(path):
+                continue
+            if image is None:
+                image = open_source_image(photo)
+            content = render_face_crop(image, photo.person_face_box, preset, fmt)
+            write_atomically(path, content)
+            track_cache_growth(len(content))
+            written += 1
+    return written
+
+
+def precompute_derivatives(photo, preset):
+    """
+    Write the `preset` derivative of the photo in all formats ahead of
+    use, fetching the source image at most once. Returns the number of
+    files written.
+    """
+    image = None
+    written = 0
+    for fmt in DERIVATIVE_FORMATS:
+        path = derivative_path(photo, preset, fmt)
+        if os.path.exists(path):
+            os.utime(path)
+            continue
+        if image is None:
+            image = open_source_image(photo)
+        content = render_derivative(image, preset, fmt)
+        write_atomically(path, content)
+        track_cache_growth(len(content))
+        written += 1
+    return written
+
+
+def track_cache_growth(size):
+    try:
+        cache.incr(CACHE_SIZE_KEY, size)
+    except ValueError:
+        # Unknown size; the next prune walks the tree and records it
+        pass
+
+
+def derivative_cache_over_budget():
+    size = cache.get(CACHE_SIZE_KEY)
+    return size is None or size > settings.DERIVATIVE_CACHE_MAX_BYTES
+
+
+def prune_derivatives():
+    """
+    Delete least recently used derivatives until the cache is back under
+    90% of DERIVATIVE_CACHE_MAX_BYTES, and record the size that is left.
+    Returns tuple: (files removed, bytes left)
+    """
+    if not cache.add(PRUNE_LOCK_KEY, True, 600):
+        return 0, cache.get(CACHE_SIZE_KEY) or 0
+
+    try:
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(derivative_root()):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        target = int(settings.DERIVATIVE_CACHE_MAX_BYTES * 0.9)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        cache.set(CACHE_SIZE_KEY, total, None)
+        logger.info(f"Pruned {removed} derivatives, {total} bytes left")
+        return removed, total
+    finally:
+        cache.delete(PRUNE_LOCK_KEY)
@@ -0,0 +1,95 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from django.conf import settings
+from PIL import Image
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+EXIF_IFD = 0x8769
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_DATETIME = 306
+EXIF_ORIENTATION = 0x0112
+# Orientations that rotate the image by 90 degrees
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+# Below this many images the pool costs more than it saves
+POOL_MIN_IMAGES = 8
+
+
+def parse_exif_date(value):
+    """
+    EXIF dates look like '2019:07:14 16:02:11'; cameras without a clock
+    write zeros or blanks.
+    """
+    if isinstance(value, bytes):
+        value = value.decode('ascii', errors='ignore')
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value.strip()[:10], '%Y:%m:%d').date()
+    except ValueError:
+        return None
+
+
+def read_image_header(source):
+    """
+    Capture date and displayed dimensions of an image. Pillow only parses
+    the header on open and getexif reads the APP1 segment, so no pixel
+    data is decoded. `source` is a path, bytes or a file object.
+    Returns tuple: (date or None, width, height), or None if unreadable
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    try:
+        with Image.open(source) as img:
+            width, height = img.size
+            exif = img.getexif()
+            if exif.get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS:
+                width, height = height, width
+            taken = parse_exif_date(exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL))
+            if taken is None:
+                taken = parse_exif_date(exif.get(EXIF_DATETIME))
+    except (OSError, SyntaxError, ValueError) as e:
+        logger.debug(f"Could not read image header: {e}")
+        return None
+    finally:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+    return taken, width, height
+
+
+def header_pool(workers):
+    """
+    Celery prefork children are daemonic and may not fork, so they read
+    headers on threads instead.
+    """
+    if multiprocessing.current_process().daemon:
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def read_image_headers(sources):
+    """
+    Read the headers of many images in parallel. `sources` maps a key to
+    a path or bytes, both of which can be sent to worker processes.
+    Returns dict: key -> (date or None, width, height) or None
+    """
+    if len(sources) < POOL_MIN_IMAGES:
+        return {key: read_image_header(source) for key, source in sources.items()}
+
+    keys = list(sources.keys())
+    workers = settings.UPLOAD_EXIF_WORKERS or os.cpu_count() or 1
+    try:
+        with header_pool(workers) as pool:
+            headers = list(pool.map(read_image_header, [sources[key] for key in keys], chunksize=16))
+    except BrokenProcessPool as e:
+        logger.warning(f"Header pool failed, reading serially: {e}")
+        headers = [read_image_header(sources[key]) for key in keys]
+    return dict(zip(keys, headers))
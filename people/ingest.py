@@ -0,0 +1,74 @@
+import logging
+
+from .agelane import refresh_age_lane
+from .cache import data_changed
+from .stats import refresh_person_stats
+from .models import Photo
+
+logger = logging.getLogger(__name__)
+
+
+def bulk_upsert_photos(person, source, rows):
+    """
+    Write one page of photos for a person and source with a set-based upsert.
+    `rows` maps source_id to a dict of Photo field values; every row must
+    carry the same fields. Needs one SELECT and one INSERT ... ON CONFLICT
+    regardless of the page size.
+    Returns tuple: (dict with inserted, updated and unchanged counts,
+    ids of the photos that were inserted or updated)
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not rows:
+        return stats, []
+
+    fields = list(next(iter(rows.values())).keys())
+
+    existing = {
+        values["source_id"]: values
+        for values in Photo.objects.filter(
+            person=person,
+            source=source,
+            source_id__in=list(rows.keys()),
+        ).values("source_id", *fields)
+    }
+
+    to_write = []
+    months = set()
+    for source_id, values in rows.items():
+        current = existing.get(source_id)
+        if current is None:
+            stats["inserted"] += 1
+        elif all(current[field] == values[field] for field in fields):
+            stats["unchanged"] += 1
+            continue
+        else:
+            stats["updated"] += 1
+            months.add(current.get("age_at_photo_months"))
+
+        months.add(values.get("age_at_photo_months"))
+
+        to_write.append(Photo(person=person, source=source, source_id=source_id, **values))
+
+    if not to_write:
+        return stats, []
+
+    Photo.objects.bulk_create(
+        to_write,
+        update_conflicts=True,
+        unique_fields=["person", "source", "source_id"],
+        update_fields=fields,
+    )
+    # bulk_create sends no signals, so the age lane is refreshed here
+    refresh_age_lane(person.id, months)
+    refresh_person_stats([person.id])
+    data_changed()
+
+    # Upserted rows only get their pks set by bulk_create on Django 5.0+
+    written_ids = list(
+        Photo.objects.filter(
+            person=person,
+            source=source,
+            source_id__in=[photo.source_id for photo in to_write],
+        ).values_list("id", flat=True)
+    )
+    return stats, written_ids
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from people.cache import data_changed
+from people.stats import reconcile_person_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized photo statistics of every person"
+
+    def handle(self, *args, **options):
+        repaired = reconcile_person_stats()
+        if repaired:
+            data_changed()
+        self.stdout.write(f"Repaired photo statistics of {repaired} persons")
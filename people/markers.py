@@ -0,0 +1,47 @@
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+
+class MarkerCache:
+    """
+    PhotoPrism file details (including Markers) looked up during one sync
+    run, so a file shared by several persons is fetched once.
+    Keeps at most `max_entries` in memory, least recently used first out.
+    With a `ttl` (seconds) entries are also kept in the Django cache, so
+    later runs and other workers can reuse them. Thread-safe.
+    """
+
+    key_prefix = "photoprism_file_"
+
+    def __init__(self, max_entries, ttl=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, file_hash):
+        with self.lock:
+            if file_hash in self.entries:
+                self.entries.move_to_end(file_hash)
+                return self.entries[file_hash]
+
+        if self.ttl:
+            file_data = cache.get(self.key_prefix + file_hash)
+            if file_data is not None:
+                self._remember(file_hash, file_data)
+            return file_data
+        return None
+
+    def set(self, file_hash, file_data):
+        self._remember(file_hash, file_data)
+        if self.ttl:
+            cache.set(self.key_prefix + file_hash, file_data, self.ttl)
+
+    def _remember(self, file_hash, file_data):
+        with self.lock:
+            self.entries[file_hash] = file_data
+            self.entries.move_to_end(file_hash)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
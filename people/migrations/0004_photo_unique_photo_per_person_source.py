@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0003_photo_file_path'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='photo',
+            constraint=models.UniqueConstraint(fields=('person', 'source', 'source_id'), name='unique_photo_per_person_source'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0004_photo_unique_photo_per_person_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=100)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+                ('person_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('last_synced_at', models.DateTimeField(auto_now=True)),
+                ('person', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_states', to='people.person')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('person', 'source'), name='unique_sync_state_per_person_source')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:49
+
+import os
+
+from django.db import migrations, models
+
+
+def backfill_upload_identity(apps, schema_editor):
+    Photo = apps.get_model('people', 'Photo')
+    photos = Photo.objects.filter(source='own_json').select_related('blob')
+    batch = []
+    for photo in photos.iterator(chunk_size=500):
+        if photo.blob_id:
+            # Blob-backed files are named by digest; the upload name is gone
+            photo.content_sha256 = photo.blob.key
+        else:
+            photo.original_filename = os.path.basename(photo.file_path.name or '')
+        batch.append(photo)
+        if len(batch) >= 500:
+            Photo.objects.bulk_update(batch, ['original_filename', 'content_sha256'])
+            batch = []
+    if batch:
+        Photo.objects.bulk_update(batch, ['original_filename', 'content_sha256'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0006_mediablob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='content_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='original_filename',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.RunPython(backfill_upload_identity, migrations.RunPython.noop),
+    ]
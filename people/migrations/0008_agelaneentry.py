@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_age_lanes(apps, schema_editor):
+    Photo = apps.get_model('people', 'Photo')
+    AgeLaneEntry = apps.get_model('people', 'AgeLaneEntry')
+    picks = (
+        Photo.objects.filter(age_at_photo_months__gte=0)
+        .values('person_id', 'age_at_photo_months')
+        .annotate(photo_id=models.Min('id'))
+        .values_list('person_id', 'age_at_photo_months', 'photo_id')
+    )
+    AgeLaneEntry.objects.bulk_create(
+        [
+            AgeLaneEntry(person_id=person_id, age_in_months=month, photo_id=photo_id)
+            for person_id, month, photo_id in picks.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0007_photo_upload_identity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgeLaneEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('age_in_months', models.IntegerField()),
+                ('person', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='age_lane', to='people.person')),
+                ('photo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='people.photo')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('person', 'age_in_months'), name='unique_age_lane_entry_per_person_month')],
+            },
+        ),
+        migrations.RunPython(build_age_lanes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:00
+
+from django.db import migrations, models
+
+
+def fill_person_stats(apps, schema_editor):
+    Person = apps.get_model('people', 'Person')
+    Photo = apps.get_model('people', 'Photo')
+    rows = Photo.objects.values('person_id').annotate(
+        photo_count=models.Count('id'),
+        earliest_photo=models.Min('photo_date'),
+        latest_photo=models.Max('photo_date'),
+        min_age_months=models.Min('age_at_photo_months'),
+        max_age_months=models.Max('age_at_photo_months'),
+    )
+    for row in rows.iterator():
+        Person.objects.filter(id=row.pop('person_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0008_agelaneentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='earliest_photo',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='latest_photo',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='max_age_months',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='min_age_months',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='photo_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_person_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:02
+
+from django.db import migrations, models
+
+
+def fill_media_type(apps, schema_editor):
+    Photo = apps.get_model('people', 'Photo')
+    Photo.objects.filter(metadata__type='VIDEO').update(media_type='VIDEO')
+    Photo.objects.filter(metadata__photoprism_photo__Type='video').update(media_type='VIDEO')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0009_person_photo_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='media_type',
+            field=models.CharField(choices=[('IMAGE', 'Image'), ('VIDEO', 'Video')], default='IMAGE', max_length=16),
+        ),
+        migrations.RunPython(fill_media_type, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(condition=models.Q(('media_type', 'IMAGE')), fields=['age_at_photo_months', 'person'], name='photo_image_age_person_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:03
+
+import hashlib
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def slim(metadata):
+    if 'photoprism_photo' in metadata:
+        kind = (metadata.get('photoprism_photo') or {}).get('Type')
+        return {'type': kind} if kind else {}
+    return {key: metadata[key] for key in ('type', 'checksum') if key in metadata}
+
+
+def move_metadata_to_payloads(apps, schema_editor):
+    Photo = apps.get_model('people', 'Photo')
+    PhotoPayload = apps.get_model('people', 'PhotoPayload')
+
+    photos = Photo.objects.exclude(metadata={}).only('id', 'metadata')
+    payload_ids = {}
+    batch = []
+
+    def flush():
+        new = {}
+        for photo in batch:
+            raw = json.dumps(photo.metadata, sort_keys=True, separators=(',', ':'), default=str).encode()
+            digest = hashlib.sha256(raw).hexdigest()
+            if digest not in payload_ids and digest not in new:
+                new[digest] = PhotoPayload(digest=digest, data=zlib.compress(raw, 6), size=len(raw))
+            photo._digest = digest
+        if new:
+            PhotoPayload.objects.bulk_create(new.values(), ignore_conflicts=True)
+            payload_ids.update(
+                PhotoPayload.objects.filter(digest__in=list(new)).values_list('digest', 'id')
+            )
+        for photo in batch:
+            photo.payload_id = payload_ids[photo._digest]
+            photo.metadata = slim(photo.metadata)
+        Photo.objects.bulk_update(batch, ['metadata', 'payload'])
+        batch.clear()
+
+    for photo in photos.iterator(chunk_size=500):
+        batch.append(photo)
+        if len(batch) >= 500:
+            flush()
+    if batch:
+        flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0010_photo_media_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhotoPayload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='payload',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='photos', to='people.photopayload'),
+        ),
+        migrations.RunPython(move_metadata_to_payloads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0011_photopayload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photopayload',
+            name='last_seen',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,4 +1,8 @@
+import json
+import zlib
+
 from django.db import models
+from django.utils import timezone
 
 
 class Person(models.Model):
@@ -8,8 +12,56 @@ class Person(models.Model):
     thumbnail_path = models.CharField(max_length=500, blank=True, null=True)
     updated_at = models.DateTimeField()
 
+    # Photo statistics kept up to date by people.stats
+    photo_count = models.PositiveIntegerField(default=0)
+    earliest_photo = models.DateField(null=True, blank=True)
+    latest_photo = models.DateField(null=True, blank=True)
+    min_age_months = models.IntegerField(null=True, blank=True)
+    max_age_months = models.IntegerField(null=True, blank=True)
+
+
+class MediaBlob(models.Model):
+    """
+    Image file stored once per content hash and shared by every Photo that
+    shows it. A blob without photos may be garbage collected.
+    """
+    key = models.CharField(max_length=128, unique=True)
+    file = models.ImageField(upload_to='blobs/')
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Last time an ingest stored or reused this blob; the collector waits for it
+    last_seen = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"MediaBlob({self.key})"
+
+
+class PhotoPayload(models.Model):
+    """
+    Raw upstream document of a photo (Immich asset, PhotoPrism photo and
+    file), zlib-compressed and stored once per content digest. Photo only
+    keeps the few metadata fields the app reads; this is loaded on demand.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Last time a sync stored or reused this payload; the collector waits for it
+    last_seen = models.DateTimeField(default=timezone.now, db_index=True)
+
+    @property
+    def document(self):
+        return json.loads(zlib.decompress(self.data))
+
+    def __str__(self):
+        return f"PhotoPayload({self.digest})"
+
 
 class Photo(models.Model):
+    IMAGE = 'IMAGE'
+    VIDEO = 'VIDEO'
+    MEDIA_TYPES = [(IMAGE, 'Image'), (VIDEO, 'Video')]
+
     person = models.ForeignKey(Person, related_name='photos', on_delete=models.CASCADE)
     photo_date = models.DateField(null=True, blank=True)
 
@@ -18,16 +70,31 @@ class Photo(models.Model):
 
     # For uploads
     file_path = models.ImageField(upload_to='photos/%Y/%m/', blank=True, null=True)
+    # Shared file behind file_path; PROTECT keeps referenced blobs alive
+    blob = models.ForeignKey(MediaBlob, related_name='photos', on_delete=models.PROTECT, blank=True, null=True)
+    # Identity of uploaded files, used to recognise re-uploads
+    original_filename = models.CharField(max_length=255, blank=True, db_index=True)
+    content_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
     # For external sources
     remote_url = models.URLField(max_length=500, blank=True)
     
     person_face_box = models.JSONField(default=list, blank=True)    
+    # Only what the app reads (type, checksum); the full document is in payload
     metadata = models.JSONField(default=dict, blank=True)
+    payload = models.ForeignKey(PhotoPayload, related_name='photos', on_delete=models.SET_NULL, blank=True, null=True)
+    media_type = models.CharField(max_length=16, choices=MEDIA_TYPES, default=IMAGE)
     created_at = models.DateTimeField(auto_now_add=True)
 
     age_at_photo_years = models.FloatField(null=True, blank=True)
     age_at_photo_months = models.IntegerField(null=True, blank=True)
     
+    @property
+    def raw_metadata(self):
+        """Full upstream document; costs a query and a decompress."""
+        if self.payload_id:
+            return self.payload.document
+        return self.metadata
+
     @property
     def photo_url(self):
         if self.file_path:
@@ -35,7 +102,62 @@ class Photo(models.Model):
         return self.remote_url
 
     class Meta:
-        indexes = [models.Index(fields=['person', 'photo_date'])]
+        indexes = [
+            models.Index(fields=['person', 'photo_date']),
+            # Same-age lookups only ever ask for images by age range
+            models.Index(
+                fields=['age_at_photo_months', 'person'],
+                condition=models.Q(media_type='IMAGE'),
+                name='photo_image_age_person_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['person', 'source', 'source_id'],
+                name='unique_photo_per_person_source',
+            ),
+        ]
 
     def __str__(self):
         return f"Photo({self.person}, {self.photo_date})"
+
+
+class SyncState(models.Model):
+    """High-water mark of the last successful sync per person and source."""
+    person = models.ForeignKey(Person, related_name='sync_states', on_delete=models.CASCADE)
+    source = models.CharField(max_length=100)
+    watermark = models.DateTimeField(null=True, blank=True)
+    person_updated_at = models.DateTimeField(null=True, blank=True)
+    last_synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['person', 'source'],
+                name='unique_sync_state_per_person_source',
+            ),
+        ]
+
+    def __str__(self):
+        return f"SyncState({self.person}, {self.source}, {self.watermark})"
+
+
+class AgeLaneEntry(models.Model):
+    """
+    Representative photo of a person for one month of age, kept up to date
+    when photos are written so the age lane is a plain range read.
+    """
+    person = models.ForeignKey(Person, related_name='age_lane', on_delete=models.CASCADE)
+    age_in_months = models.IntegerField()
+    photo = models.ForeignKey(Photo, related_name='+', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['person', 'age_in_months'],
+                name='unique_age_lane_entry_per_person_month',
+            ),
+        ]
+
+    def __str__(self):
+        return f"AgeLaneEntry({self.person}, {self.age_in_months})"
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import zlib
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PhotoPayload
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Metadata fields Photo keeps inline: type for filtering, checksum for ETags
+SLIM_METADATA_KEYS = ("type", "checksum")
+PAYLOAD_COMPRESSION_LEVEL = 6
+# Payloads are stored or reused just before the photos pointing at them
+PAYLOAD_GC_GRACE = timedelta(hours=1)
+# Reused payloads seen more recently than this are not touched again
+PAYLOAD_TOUCH_INTERVAL = PAYLOAD_GC_GRACE / 2
+
+
+def slim_metadata(document):
+    return {key: document[key] for key in SLIM_METADATA_KEYS if key in document}
+
+
+def encode_payload(document):
+    """
+    Canonical JSON, so equal documents share a digest however their keys
+    were ordered.
+    Returns tuple: (sha256 digest, compressed bytes, uncompressed size)
+    """
+    raw = json.dumps(document, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.sha256(raw).hexdigest(), zlib.compress(raw, PAYLOAD_COMPRESSION_LEVEL), len(raw)
+
+
+def store_payloads(documents):
+    """
+    Store documents once per digest; identical documents, such as an asset
+    shared by several persons, end up in one row.
+    Returns list of PhotoPayload ids in the order of `documents`
+    """
+    encoded = [encode_payload(document) for document in documents]
+    digests = {digest for digest, _, _ in encoded}
+
+    # Touch reused payloads before reading their ids: an orphan about to be
+    # referenced again must not be collected before its photos are written.
+    # The update waits for a collector holding the row, and a payload it
+    # deleted meanwhile is simply stored anew below.
+    now = timezone.now()
+    PhotoPayload.objects.filter(
+        digest__in=digests, last_seen__lt=now - PAYLOAD_TOUCH_INTERVAL
+    ).update(last_seen=now)
+
+    ids = dict(PhotoPayload.objects.filter(digest__in=digests).values_list('digest', 'id'))
+    missing = {}
+    for digest, data, size in encoded:
+        if digest not in ids and digest not in missing:
+            missing[digest] = PhotoPayload(digest=digest, data=data, size=size)
+
+    if missing:
+        PhotoPayload.objects.bulk_create(missing.values(), ignore_conflicts=True)
+        ids.update(PhotoPayload.objects.filter(digest__in=list(missing)).values_list('digest', 'id'))
+
+    return [ids[digest] for digest, _, _ in encoded]
+
+
+def store_payload(document):
+    return store_payloads([document])[0]
+
+
+def collect_orphan_payloads():
+    """
+    Delete payloads no photo refers to any more, e.g. older versions of an
+    asset document, once no sync stored or reused them for the grace period.
+    Returns number of deleted payloads
+    """
+    cutoff = timezone.now() - PAYLOAD_GC_GRACE
+    with transaction.atomic():
+        # Locked, so a sync reusing one of them waits until they are gone
+        orphans = list(
+            PhotoPayload.objects.select_for_update(of=('self',))
+            .filter(photos__isnull=True, last_seen__lt=cutoff)
+            .values_list('id', flat=True)
+        )
+        deleted, _ = PhotoPayload.objects.filter(id__in=orphans).delete()
+    return deleted
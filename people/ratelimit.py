@@ -0,0 +1,45 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by the workers of one sync run.
+    The refill rate adapts: it is halved on every error (down to
+    `min_rate`) and creeps back up by 10% of the ceiling on every success.
+    """
+
+    def __init__(self, rate, capacity=None, min_rate=0.5):
+        self.max_rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.rate = self.max_rate
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self):
+        with self.lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def reward(self):
+        with self.lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
@@ -43,7 +43,6 @@ class PhotoSerializer(serializers.ModelSerializer):
         return f"{years}y {months}m"
 
 class PersonSerializer(serializers.ModelSerializer):
-    photo_count = serializers.SerializerMethodField()
     oldest_age = serializers.SerializerMethodField()
     youngest_age = serializers.SerializerMethodField()
     age_in_days = serializers.SerializerMethodField()
@@ -57,12 +56,11 @@ class PersonSerializer(serializers.ModelSerializer):
             "photo_count",
             "oldest_age",
             "youngest_age",
+            "min_age_months",
+            "max_age_months",
             "age_in_days",
         ]
 
-    def get_photo_count(self, obj):
-        return getattr(obj, "photo_count", 0)
-
     def get_oldest_age(self, obj):
         if not obj.earliest_photo:
             return None
@@ -0,0 +1,69 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .agelane import queue_lane_refresh, recompute_photo_ages
+from .cache import data_changed
+from .models import Person, Photo
+from .stats import add_photo_to_stats, queue_stats_refresh, refresh_person_stats
+
+
+@receiver(pre_save, sender=Person)
+def remember_birth_date(sender, instance, **kwargs):
+    instance._previous_birth_date = None
+    if instance.pk:
+        instance._previous_birth_date = (
+            Person.objects.filter(pk=instance.pk).values_list('birth_date', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Person)
+def birth_date_changed(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_birth_date', None)
+    if not created and previous is not None and str(previous) != str(instance.birth_date):
+        instance.refresh_from_db(fields=['birth_date'])
+        recompute_photo_ages(instance)
+        refresh_person_stats([instance.id])
+
+
+@receiver(pre_save, sender=Photo)
+def remember_photo_placement(sender, instance, **kwargs):
+    instance._previous_placement = None
+    if instance.pk:
+        instance._previous_placement = (
+            Photo.objects.filter(pk=instance.pk)
+            .values_list('person_id', 'photo_date', 'age_at_photo_months')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Photo)
+def photo_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_placement', None)
+    if created or previous is None:
+        queue_lane_refresh(instance.person_id, [instance.age_at_photo_months])
+        add_photo_to_stats(instance.person_id, instance.photo_date, instance.age_at_photo_months)
+        return
+
+    person_id, photo_date, month = previous
+    current = (instance.person_id, str(instance.photo_date), instance.age_at_photo_months)
+    if current != (person_id, str(photo_date), month):
+        # A moved photo may have been a minimum or maximum, so aggregate
+        queue_lane_refresh(person_id, [month])
+        queue_lane_refresh(instance.person_id, [instance.age_at_photo_months])
+        queue_stats_refresh([person_id, instance.person_id])
+
+
+@receiver(post_delete, sender=Photo)
+def photo_deleted(sender, instance, **kwargs):
+    # Wait for the commit: a person being deleted takes all photos along
+    queue_lane_refresh(instance.person_id, [instance.age_at_photo_months])
+    queue_stats_refresh([instance.person_id])
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+@receiver(post_save, sender=Photo)
+@receiver(post_delete, sender=Photo)
+def people_or_photos_changed(sender, **kwargs):
+    # Covers single saves such as admin edits; bulk writes call data_changed
+    data_changed()
@@ -0,0 +1,119 @@
+import threading
+
+from django.db.models import Count, DateField, F, IntegerField, Max, Min, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from .models import Person, Photo
+from .utils import on_commit_once
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# person_ids waiting for the current transaction to commit
+_pending = threading.local()
+
+STAT_FIELDS = ['photo_count', 'earliest_photo', 'latest_photo', 'min_age_months', 'max_age_months']
+
+
+def photo_stats(person_ids=None):
+    """
+    Aggregate the photo statistics of persons, or of everybody, in one
+    grouped query.
+    Returns dict: person_id -> dict of Person stat fields
+    """
+    photos = Photo.objects.all()
+    if person_ids is not None:
+        photos = photos.filter(person_id__in=person_ids)
+
+    rows = photos.values('person_id').annotate(
+        photo_count=Count('id'),
+        earliest_photo=Min('photo_date'),
+        latest_photo=Max('photo_date'),
+        min_age_months=Min('age_at_photo_months'),
+        max_age_months=Max('age_at_photo_months'),
+    )
+    return {row.pop('person_id'): row for row in rows}
+
+
+def apply_stats(people, stats):
+    """
+    Set the stat fields of `people`; persons without photos get empty stats.
+    Returns list of persons whose stored values changed
+    """
+    empty = {'photo_count': 0, 'earliest_photo': None, 'latest_photo': None,
+             'min_age_months': None, 'max_age_months': None}
+    changed = []
+    for person in people:
+        values = stats.get(person.id, empty)
+        if any(getattr(person, field) != values[field] for field in STAT_FIELDS):
+            for field in STAT_FIELDS:
+                setattr(person, field, values[field])
+            changed.append(person)
+    return changed
+
+
+def refresh_person_stats(person_ids):
+    """
+    Recompute the stored photo statistics of the given persons after their
+    photos changed. Uses the (person, ...) indexes, so the cost follows
+    the photos of these persons, not the whole table.
+    Returns number of persons updated
+    """
+    person_ids = {person_id for person_id in person_ids if person_id is not None}
+    if not person_ids:
+        return 0
+
+    people = Person.objects.filter(id__in=person_ids).only('id', *STAT_FIELDS)
+    changed = apply_stats(people, photo_stats(person_ids))
+    # update() instead of save() keeps the Person signals out of it
+    for person in changed:
+        Person.objects.filter(id=person.id).update(**{field: getattr(person, field) for field in STAT_FIELDS})
+    return len(changed)
+
+
+def add_photo_to_stats(person_id, photo_date, age_months):
+    """
+    Fold one new photo into the stored statistics of its person with a
+    single UPDATE, without aggregating the person's other photos.
+    """
+    values = {'photo_count': F('photo_count') + 1}
+    if photo_date is not None:
+        photo_date = Value(photo_date, output_field=DateField())
+        values['earliest_photo'] = Least(Coalesce('earliest_photo', photo_date), photo_date)
+        values['latest_photo'] = Greatest(Coalesce('latest_photo', photo_date), photo_date)
+    if age_months is not None:
+        age_months = Value(age_months, output_field=IntegerField())
+        values['min_age_months'] = Least(Coalesce('min_age_months', age_months), age_months)
+        values['max_age_months'] = Greatest(Coalesce('max_age_months', age_months), age_months)
+    Person.objects.filter(id=person_id).update(**values)
+
+
+def queue_stats_refresh(person_ids):
+    """
+    Refresh the statistics of persons once the transaction commits, so
+    deleting many photos of a person aggregates that person only once.
+    """
+    if not hasattr(_pending, 'person_ids'):
+        _pending.person_ids = set()
+    _pending.person_ids.update(person_id for person_id in person_ids if person_id is not None)
+    on_commit_once(flush_stats_refreshes)
+
+
+def flush_stats_refreshes():
+    person_ids, _pending.person_ids = _pending.person_ids, set()
+    refresh_person_stats(person_ids)
+
+
+def reconcile_person_stats():
+    """
+    Recompute the statistics of every person and repair any drift.
+    Returns number of persons that were off
+    """
+    people = Person.objects.only('id', *STAT_FIELDS)
+    changed = apply_stats(people, photo_stats())
+    Person.objects.bulk_update(changed, STAT_FIELDS, batch_size=500)
+    for person in changed:
+        logger.info(f"Repaired photo statistics of person {person.id}")
+    return len(changed)
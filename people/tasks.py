@@ -1,18 +1,27 @@
 import requests
 from datetime import datetime
-from celery import shared_task
+from celery import shared_task, chain, chord
 from django.conf import settings
-from .models import Person, Photo
+from django.utils import timezone
+from .models import MediaBlob, Person, Photo, SyncState
+from .ingest import bulk_upsert_photos
+from .cache import data_changed
+from . import upstream
+from .ratelimit import TokenBucket
+from .markers import MarkerCache
+from .blobs import attach_blob, collect_orphan_blobs, store_blob
+from .payloads import collect_orphan_payloads, slim_metadata, store_payload, store_payloads
+from .uploads import delete_upload_session, load_manifest, process_json_upload, prune_upload_sessions, staged_files
+from .utils import age_at_photo
+from .derivatives import derivative_cache_over_budget, precompute_derivatives, precompute_face_crops, prune_derivatives
 import os
 from uuid import UUID
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
 
-from django.core.files.base import ContentFile
-import time
-
 
 
 
@@ -26,7 +35,7 @@ def immich_get(path):
         "x-api-key": IMMICH_API_KEY,
         "Accept": "application/json"
     }
-    resp = requests.get(url, headers=headers, timeout=30)
+    resp = upstream.get(url, headers=headers, timeout=30)
     resp.raise_for_status()
     return resp.json()
 
@@ -38,111 +47,242 @@ def immich_post(path, data):
         "Accept": "application/json",
     }
     logger.info(f"POST {url} with data {data}")
-    resp = requests.post(url, json=data, headers=headers, timeout=120)
+    resp = upstream.post(url, json=data, headers=headers, timeout=120)
     resp.raise_for_status()
     return resp.json()
 
 
+def parse_api_datetime(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def immich_photo_row(person, asset):
+    """
+    Build the Photo field values for one Immich asset of a person.
+    Returns None when the person is not tagged on the asset.
+    """
+    person_data = next(
+        (pd for pd in asset.get("people", []) if pd["id"] == str(person.immich_id)),
+        None
+    )
+    if not person_data:
+        return None
+
+    photo_id = asset.get("id")
+    taken_at_raw = asset.get("fileCreatedAt")
+    photo_date = None
+    if taken_at_raw:
+        try:
+            photo_date = parse_api_datetime(taken_at_raw).date()
+        except Exception as e:
+            logger.warning(f"Failed to parse photo_date for photo {photo_id}: {e}")
+
+    faces = person_data.get("faces", [])
+    face_box = faces[0] if faces else None
+
+    age_years, age_months = age_at_photo(person.birth_date, photo_date)
+
+    return {
+        "photo_date": photo_date,
+        "remote_url": f"{IMMICH_API_URL}/assets/{photo_id}/original",
+        "person_face_box": face_box if face_box else [],
+        "metadata": slim_metadata(asset),
+        "media_type": Photo.VIDEO if asset.get("type") == "VIDEO" else Photo.IMAGE,
+        "age_at_photo_years": age_years,
+        "age_at_photo_months": age_months,
+    }
+
+
+def sync_immich_person_assets(person, updated_after=None):
+    """
+    Page through /search/metadata for one person and upsert every page.
+    With `updated_after` only assets changed since that moment are fetched.
+    Returns tuple: (stats dict, newest asset updatedAt seen or None)
+    """
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+    newest = None
+
+    data = {"personIds": [str(person.immich_id)]}
+    if updated_after:
+        data["updatedAfter"] = updated_after.isoformat()
+    next_page = True
+
+    while next_page:
+        search_result = immich_post("/search/metadata", data)
+        assets = search_result.get("assets", {}).get("items", [])
+        logger.info(f"Found {len(assets)} assets for {person.name} on current page")
+
+        rows = {}
+        documents = {}
+        for asset in assets:
+            if asset.get("updatedAt"):
+                asset_updated = parse_api_datetime(asset["updatedAt"])
+                if newest is None or asset_updated > newest:
+                    newest = asset_updated
+
+            row = immich_photo_row(person, asset)
+            if row is not None:
+                rows[str(asset.get("id"))] = row
+                documents[str(asset.get("id"))] = asset
+
+        # The full asset goes to the compressed payload table, once per digest
+        payload_ids = store_payloads([documents[source_id] for source_id in rows])
+        for row, payload_id in zip(rows.values(), payload_ids):
+            row["payload_id"] = payload_id
+
+        stats, written = bulk_upsert_photos(person, "immich", rows)
+        if written:
+            build_face_crops.delay(written)
+        for key, value in stats.items():
+            totals[key] += value
+        logger.info(
+            f"Page for {person.name}: {stats['inserted']} inserted, "
+            f"{stats['updated']} updated, {stats['unchanged']} unchanged"
+        )
+
+        next_page = search_result.get("assets", {}).get("nextPage")
+        if next_page:
+            logger.info(f"Fetching next page {next_page} for {person.name}")
+            data["page"] = next_page
+
+    return totals, newest
+
+
 @shared_task(bind=True, max_retries=3)
-def sync_people_and_photos(self):
+def sync_people_and_photos(self, full=False):
+    """
+    Coordinate the Immich sync.
+    Fetches the people list and fans out one sync_immich_person task per
+    person with a birth date. The tasks run in IMMICH_SYNC_CONCURRENCY
+    parallel chains so Immich never sees more concurrent searches than
+    that; summarize_immich_sync aggregates the counts once all are done.
+    Pass full=True to rescan every person from scratch.
+    """
     try:
         people_json = immich_get("/people").get("people", [])
-        logger.info(f"Found {len(people_json)} people in Immich")
+    except requests.RequestException as exc:
+        logger.error(f"HTTP error during sync: {exc}")
+        raise self.retry(exc=exc, countdown=60)
 
-        for p in people_json:
-            birthdate_raw = p.get("birthDate")
-            birthdate = None
-            if birthdate_raw:
-                try:
-                    birthdate = datetime.fromisoformat(birthdate_raw).date()
-                except Exception as e:
-                    logger.warning(f"Could not parse birthdate for {p.get('name')}: {e}")
+    people_json = [p for p in people_json if p.get("birthDate")]
+    logger.info(f"Found {len(people_json)} people with a birth date in Immich ({'full' if full else 'incremental'} sync)")
+    if not people_json:
+        return "Sync complete: no people to sync"
 
-            if birthdate:
+    lanes = min(settings.IMMICH_SYNC_CONCURRENCY, len(people_json))
+    header = []
+    for lane in range(lanes):
+        lane_people = people_json[lane::lanes]
+        # Each link receives the running totals of the previous one, so the
+        # first link is given empty totals explicitly.
+        links = [sync_immich_person.s({}, lane_people[0], full)]
+        links += [sync_immich_person.s(p, full) for p in lane_people[1:]]
+        header.append(chain(*links))
 
-                try:
-                    person, _ = Person.objects.update_or_create(
-                        immich_id=str(UUID(p["id"])),
-                        defaults={
-                            "name": p.get("name", ""),
-                            "birth_date": birthdate,
-                            "thumbnail_path": p.get("thumbnailPath"),
-                            "updated_at": datetime.fromisoformat(p["updatedAt"].replace("Z", "+00:00"))
-                        }
-                    )
-                    logger.info(f"Processing person: {person.name} ({person.immich_id})")
-
-                    data = {"personIds": [str(person.immich_id)]}
-                    next_page = True
-
-                    while next_page:
-                        search_result = immich_post("/search/metadata", data)
-                        assets = search_result.get("assets", {}).get("items", [])
-                        logger.info(f"Found {len(assets)} assets for {person.name} on current page")
-
-                        for asset in assets:
-                            person_data = next(
-                                (pd for pd in asset.get("people", []) if pd["id"] == str(person.immich_id)),
-                                None
-                            )
-                            if not person_data:
-                                continue
-
-                            photo_id = asset.get("id")
-                            taken_at_raw = asset.get("fileCreatedAt")
-                            photo_date = None
-                            if taken_at_raw:
-                                try:
-                                    photo_date = datetime.fromisoformat(taken_at_raw.replace("Z", "+00:00")).date()
-                                except Exception as e:
-                                    logger.warning(f"Failed to parse photo_date for photo {photo_id}: {e}")
-
-                            faces = person_data.get("faces", [])
-                            face_box = faces[0] if faces else None
-                            remote_url = f"{IMMICH_API_URL}/assets/{photo_id}/original"
-
-                            if photo_date and person.birth_date:
-                                delta = photo_date - person.birth_date
-                                age_years = delta.days / 365.25
-                                age_months = int(delta.days / 30.44)
-                            else:
-                                age_years = None
-                                age_months = None
-
-                            Photo.objects.update_or_create(
-                                person=person,
-                                source="immich",
-                                source_id=str(photo_id),
-                                defaults={
-                                    "photo_date": photo_date,
-                                    "remote_url": remote_url,
-                                    "person_face_box": face_box if face_box else [],
-                                    "metadata": asset,
-                                    "age_at_photo_years": age_years,
-                                    "age_at_photo_months": age_months,
-                                }
-                            )
-                            logger.info(f"Added/updated photo {photo_id} for {person.name}")
-
-                        next_page = search_result.get("assets", {}).get("nextPage")
-                        print(next_page)
-                        if next_page:
-                            print(f"Fetching next page {next_page} for {person.name}")
-                            logger.info(f"Fetching next page {next_page} for {person.name}")
-                            data["page"] = next_page
+    chord(header)(summarize_immich_sync.s())
+    return f"Dispatched {len(people_json)} people over {lanes} parallel chains"
 
-                except Exception as e:
-                    logger.error(f"Error processing person {p.get('name')}: {e}")
 
-        logger.info("Sync complete")
-        return "Sync complete"
+def add_totals(totals, stats):
+    totals = dict(totals or {})
+    for key, value in stats.items():
+        if isinstance(value, list):
+            totals[key] = totals.get(key, []) + value
+        else:
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+@shared_task(bind=True, max_retries=3)
+def sync_immich_person(self, totals, person_json, full=False):
+    """
+    Sync one Immich person and their assets.
+    Only assets changed since the person's watermark are fetched, unless
+    full=True or the person's updatedAt moved (e.g. a new birth date), in
+    which case everything is rescanned so ages get recalculated.
+    Returns `totals` with this person's counts added. A person that fails
+    on bad data, or on upstream errors after all retries, is reported in
+    `errors` instead of breaking the chain.
+    """
+    name = person_json.get("name")
+    stats = {"people": 1, "inserted": 0, "updated": 0, "unchanged": 0, "errors": []}
+    upstream_before = upstream.upstream_stats()
+
+    try:
+        birthdate = datetime.fromisoformat(person_json["birthDate"]).date()
+        immich_id = str(UUID(person_json["id"]))
+        person_updated_at = parse_api_datetime(person_json["updatedAt"])
+        state = (
+            SyncState.objects
+            .filter(source="immich", person__immich_id=immich_id)
+            .select_related("person")
+            .first()
+        )
+
+        if not full and state and state.person_updated_at == person_updated_at:
+            person = state.person
+            updated_after = state.watermark
+            logger.info(f"Person {person.name} unchanged, fetching assets updated after {updated_after}")
+        else:
+            person, _ = Person.objects.update_or_create(
+                immich_id=immich_id,
+                defaults={
+                    "name": person_json.get("name", ""),
+                    "birth_date": birthdate,
+                    "thumbnail_path": person_json.get("thumbnailPath"),
+                    "updated_at": person_updated_at,
+                }
+            )
+            updated_after = None
+            logger.info(f"Processing person: {person.name} ({person.immich_id})")
+
+        page_stats, newest = sync_immich_person_assets(person, updated_after)
+        stats = add_totals(stats, page_stats)
+
+        # Only advance the watermark once every page went through
+        watermark = max(filter(None, [newest, updated_after]), default=None)
+        SyncState.objects.update_or_create(
+            person=person,
+            source="immich",
+            defaults={
+                "watermark": watermark,
+                "person_updated_at": person_updated_at,
+            }
+        )
 
-    except requests.RequestException as exc:
-        logger.error(f"HTTP error during sync: {exc}")
-        self.retry(exc=exc, countdown=60)
     except Exception as exc:
-        logger.error(f"Unexpected error during sync: {exc}")
-        self.retry(exc=exc, countdown=60)
+        # Bad person data such as an unparseable birthDate fails the same
+        # way every time, so only upstream hiccups are retried
+        if upstream.is_transient(exc) and self.request.retries < self.max_retries:
+            logger.warning(f"Error processing person {name}, retrying: {exc}")
+            raise self.retry(exc=exc, countdown=60)
+        logger.error(f"Error processing person {name}: {exc}")
+        stats["errors"].append(f"{name}: {exc}")
+
+    upstream.log_upstream_stats(upstream_before)
+    return add_totals(totals, stats)
+
+
+@shared_task
+def summarize_immich_sync(results):
+    """
+    Chord callback: add up the totals of every chain and invalidate caches.
+    """
+    totals = {}
+    for result in results:
+        totals = add_totals(totals, result or {})
+
+    data_changed()
+
+    summary = (
+        f"Sync complete: {totals.get('people', 0)} people, {totals.get('inserted', 0)} inserted, "
+        f"{totals.get('updated', 0)} updated, {totals.get('unchanged', 0)} unchanged, "
+        f"{len(totals.get('errors', []))} failed"
+    )
+    for error in totals.get("errors", []):
+        logger.error(f"Immich sync failed for {error}")
+    logger.info(summary)
+    return summary
 
 
 PHOTOPRISM_BASE_URL = os.environ.get('PHOTOPRISM_BASE_URL')
@@ -154,7 +294,7 @@ def photoprism_get(endpoint, params=None):
     headers = {}
     headers['Authorization'] = "Bearer " + PHOTOPRISM_TOKEN
     
-    response = requests.get(url, params=params, headers=headers, timeout=30)
+    response = upstream.get(url, params=params, headers=headers, timeout=30)
     response.raise_for_status()
     return response.json()
 
@@ -163,41 +303,49 @@ def photoprism_get_raw(url):
     headers = {}
     headers['Authorization'] = "Bearer " + PHOTOPRISM_TOKEN
     
-    response = requests.get(url, headers=headers, timeout=30)
+    response = upstream.get(url, headers=headers, timeout=30)
     response.raise_for_status()
     return response.content
 
 
 @shared_task(bind=True, max_retries=3)
-def sync_photoprism_photos(self):
+def sync_photoprism_photos(self, full=False):
     """
     Sync photos from PhotoPrism for all existing persons.
     For each person in the database, search PhotoPrism for photos containing that person.
+    By default paging stops at the first page without new photos; pass
+    full=True to walk every page.
     """
+    upstream_before = upstream.upstream_stats()
     try:
-        persons = Person.objects.all()
-        logger.info(f"Starting PhotoPrism sync for {persons.count()} persons")
+        persons = list(Person.objects.all())
+        logger.info(f"Starting PhotoPrism sync for {len(persons)} persons")
 
         total_imported = 0
         total_skipped = 0
 
-        for person in persons:
-            if not person.name:
-                logger.warning(f"Person {person.id} has no name, skipping")
-                continue
+        with ThreadPoolExecutor(max_workers=settings.PHOTOPRISM_CONCURRENCY) as pool:
+            run = PhotoprismRun(persons, pool)
+            for person in persons:
+                if not person.name:
+                    logger.warning(f"Person {person.id} has no name, skipping")
+                    continue
 
-            logger.info(f"Processing PhotoPrism photos for: {person.name}")
-            
-            try:
-                imported, skipped = sync_person_photos(person)
-                total_imported += imported
-                total_skipped += skipped
-                logger.info(f"Completed {person.name}: {imported} imported, {skipped} skipped")
-            except Exception as e:
-                logger.error(f"Error processing person {person.name}: {e}")
-                continue
+                logger.info(f"Processing PhotoPrism photos for: {person.name}")
+
+                try:
+                    imported, skipped = sync_person_photos(person, run, full=full)
+                    total_imported += imported
+                    total_skipped += skipped
+                    logger.info(f"Completed {person.name}: {imported} imported, {skipped} skipped")
+                except Exception as e:
+                    logger.error(f"Error processing person {person.name}: {e}")
+                    continue
 
+        if total_imported:
+            data_changed()
         logger.info(f"PhotoPrism sync complete: {total_imported} imported, {total_skipped} skipped")
+        upstream.log_upstream_stats(upstream_before)
         return f"Sync complete: {total_imported} imported, {total_skipped} skipped"
 
     except Exception as exc:
@@ -205,15 +353,59 @@ def sync_photoprism_photos(self):
         self.retry(exc=exc, countdown=60)
 
 
-def sync_person_photos(person):
+class PhotoprismRun:
+    """
+    State shared by every person of one PhotoPrism sync run: the worker
+    pool, the rate limiter, the memoized file details and the persons a
+    file's markers are matched against.
+    """
+
+    def __init__(self, persons, pool=None):
+        self.pool = pool
+        self.limiter = TokenBucket(settings.PHOTOPRISM_RATE_LIMIT, capacity=settings.PHOTOPRISM_CONCURRENCY)
+        self.markers = MarkerCache(settings.PHOTOPRISM_MARKER_CACHE_SIZE, settings.PHOTOPRISM_MARKER_CACHE_TTL)
+        # Names are not unique; a marker matches every person carrying it
+        self.persons_by_name = {}
+        for person in persons:
+            if person.name:
+                self.persons_by_name.setdefault(person.name, []).append(person)
+
+
+def sync_person_photos(person, run=None, full=True):
     """
     Sync all photos for a specific person from PhotoPrism
+    Each page is diffed against the hashes already stored for the person
+    with one query; marker lookups and downloads of the new ones run
+    concurrently on the run's pool and the Photo rows are written from
+    this thread. Every person of the run found in a file's markers gets
+    their Photo in the same pass.
+    Unless `full`, photos not updated since the last clean run of this
+    person are treated as known too, and paging stops at the first page
+    without anything new (results are newest first).
     Returns tuple: (imported_count, skipped_count)
     """
+    if run is None:
+        with ThreadPoolExecutor(max_workers=settings.PHOTOPRISM_CONCURRENCY) as pool:
+            return sync_person_photos(person, PhotoprismRun(Person.objects.all(), pool), full)
+
+    state = SyncState.objects.filter(person=person, source='photoprism').first()
+    watermark = state.watermark if state and not full else None
+    started_at = timezone.now()
+
     offset = 0
     count = 200
     imported = 0
     skipped = 0
+    errors = 0
+    imported_ids = []
+
+    def try_download(candidate):
+        photo_data, file_hash = candidate
+        try:
+            return download_photoprism_photo(run, file_hash, download=file_hash not in stored)
+        except requests.RequestException as e:
+            logger.warning(f"Error fetching {file_hash} for {person.name}: {e}")
+            return e
 
     while True:
         params = {
@@ -225,9 +417,10 @@ def sync_person_photos(person):
         }
 
         try:
-            photos_data = photoprism_get("/api/v1/photos/", params=params)
+            photos_data = limited_photoprism_call(run.limiter, photoprism_get, "/api/v1/photos/", params=params)
         except requests.RequestException as e:
             logger.error(f"Error fetching photos for {person.name}: {e}")
+            errors += 1
             break
 
         if not photos_data:
@@ -235,24 +428,42 @@ def sync_person_photos(person):
 
         logger.info(f"  Found {len(photos_data)} photos at offset {offset} for {person.name}")
 
+        page = {}
         for photo_data in photos_data:
             file_hash = photo_data.get('Hash')
-            if not file_hash:
-                continue
-
-            # Check if photo already exists
-            if Photo.objects.filter(source='photoprism', source_id=file_hash, person=person).exists():
+            if file_hash:
+                page.setdefault(file_hash, photo_data)
+
+        known = set(
+            Photo.objects.filter(person=person, source='photoprism', source_id__in=list(page))
+            .values_list('source_id', flat=True)
+        )
+        if watermark:
+            # Photos untouched since the last clean run were already looked at
+            known |= {
+                file_hash for file_hash, photo_data in page.items()
+                if photo_data.get('UpdatedAt') and parse_api_datetime(photo_data['UpdatedAt']) < watermark
+            }
+        skipped += len(known)
+        candidates = [(photo_data, file_hash) for file_hash, photo_data in page.items() if file_hash not in known]
+        # Tiles already downloaded for another person are not fetched again
+        stored = set(
+            MediaBlob.objects.filter(key__in=[file_hash for _, file_hash in candidates])
+            .values_list('key', flat=True)
+        )
+
+        for (photo_data, file_hash), download in zip(candidates, run.pool.map(try_download, candidates)):
+            if download is None or isinstance(download, Exception):
+                errors += download is not None
                 skipped += 1
                 continue
 
-            # Process this photo
-            if process_single_photo(person, photo_data, file_hash):
-                imported += 1
-            else:
+            file_data, matching_markers, photo_content = download
+            photos = save_photoprism_photos(photo_data, file_hash, file_data, matching_markers, photo_content)
+            if not any(photo.person_id == person.id for photo in photos):
                 skipped += 1
-
-            # Small delay to avoid overwhelming the server
-            time.sleep(0.1)
+            imported += len(photos)
+            imported_ids += [photo.id for photo in photos]
 
         offset += count
 
@@ -260,50 +471,149 @@ def sync_person_photos(person):
         if len(photos_data) < count:
             break
 
+        if watermark and not candidates:
+            logger.info(f"  Page at offset {offset - count} holds only known photos, stopping for {person.name}")
+            break
+
+    # A run with errors may have left photos behind on older pages, so the
+    # next run must not stop early for this person.
+    SyncState.objects.update_or_create(
+        person=person,
+        source='photoprism',
+        defaults={"watermark": None if errors else started_at},
+    )
+
+    if imported_ids:
+        build_face_crops.delay(imported_ids)
+
     return imported, skipped
 
 
-def process_single_photo(person, photo_data, file_hash):
+def photoprism_tile_url(file_hash):
+    return f"{PHOTOPRISM_BASE_URL}/api/v1/t/{file_hash}/{PHOTOPRISM_SECURITY_TOKEN}/tile_500"
+
+
+def limited_photoprism_call(limiter, func, *args, **kwargs):
     """
-    Process a single photo: check markers, download, and save
-    Returns True if imported successfully, False otherwise
+    Run one PhotoPrism request under the rate limiter, slowing the limiter
+    down when it fails and speeding it back up when it succeeds.
     """
-    
-    # Get file details with markers
+    limiter.acquire()
     try:
-        file_data = photoprism_get(f"/api/v1/files/{file_hash}/")
-    except requests.RequestException as e:
-        logger.warning(f"Error fetching file details for {file_hash}: {e}")
-        return False
+        result = func(*args, **kwargs)
+    except requests.RequestException:
+        limiter.penalize()
+        raise
+    limiter.reward()
+    return result
 
-    # Check markers for matching person
-    markers = file_data.get('Markers', [])
-    matching_marker = None
+
+def download_photoprism_photo(run, file_hash, download=True):
+    """
+    Network half of the import, safe to run on a worker thread: look up the
+    file's markers (memoized for the run), match them against every person
+    of the run and download the tile (unless `download` is False because
+    the tile is already stored).
+    Returns tuple: (file_data, {person: marker}, photo_content), or None
+    when nobody of the run is on the photo. Raises
+    requests.RequestException when PhotoPrism cannot be reached.
+    """
     
-    for marker in markers:
-        if marker.get('Name') == person.name:
-            matching_marker = marker
-            break
+    # Get file details with markers
+    file_data = run.markers.get(file_hash)
+    if file_data is None:
+        file_data = limited_photoprism_call(run.limiter, photoprism_get, f"/api/v1/files/{file_hash}/")
+        run.markers.set(file_hash, file_data)
+
+    # Check markers for every person of this run
+    matching_markers = {}
+    for marker in file_data.get('Markers', []):
+        for person in run.persons_by_name.get(marker.get('Name'), []):
+            matching_markers.setdefault(person, marker)
 
-    if not matching_marker:
-        # Person not in this photo's markers
-        return False
+    if not matching_markers:
+        # Nobody we sync is in this photo's markers
+        return None
+
+    if not download:
+        return file_data, matching_markers, None
 
     # Get download token
     download_key = PHOTOPRISM_SECURITY_TOKEN
     if not download_key:
         logger.warning(f"No download token for {file_hash}")
-        return False
+        return None
 
     # Download the photo
-    photo_url = f"{PHOTOPRISM_BASE_URL}/api/v1/t/{file_hash}/{download_key}/tile_500"
-    
+    photo_content = limited_photoprism_call(run.limiter, photoprism_get_raw, photoprism_tile_url(file_hash))
+
+    return file_data, matching_markers, photo_content
+
+
+def process_single_photo(person, photo_data, file_hash):
+    """
+    Process a single photo: check markers, download, and save
+    Returns the imported Photo, or None when it was not imported
+    """
+    run = PhotoprismRun([person])
     try:
-        photo_content = photoprism_get_raw(photo_url)
+        download = download_photoprism_photo(run, file_hash)
     except requests.RequestException as e:
-        logger.warning(f"Error downloading photo {file_hash}: {e}")
-        return False
+        logger.warning(f"Error fetching {file_hash} for {person.name}: {e}")
+        return None
+    if download is None:
+        return None
+    file_data, matching_markers, photo_content = download
+    photos = save_photoprism_photos(photo_data, file_hash, file_data, matching_markers, photo_content)
+    return photos[0] if photos else None
 
+
+def save_photoprism_photos(photo_data, file_hash, file_data, matching_markers, photo_content):
+    """
+    Database half of the import: store the downloaded tile once and create
+    a Photo for every matched person that does not have one yet.
+    `photo_content` may be None when a blob for the file hash existed
+    when the page was diffed.
+    Returns the created Photos
+    """
+    existing = set(
+        Photo.objects.filter(source='photoprism', source_id=file_hash, person__in=list(matching_markers))
+        .values_list('person_id', flat=True)
+    )
+    missing = {person: marker for person, marker in matching_markers.items() if person.id not in existing}
+    if not missing:
+        return []
+
+    # Store the tile once per file hash, shared by every person on it. A
+    # tile that was stored when the page was diffed may have been collected
+    # since, so it is fetched again if the blob is gone.
+    if photo_content is None:
+        photo_content = lambda: photoprism_get_raw(photoprism_tile_url(file_hash))
+    try:
+        blob, _ = store_blob(file_hash, photo_content)
+    except requests.RequestException as e:
+        logger.warning(f"Error fetching {file_hash} again: {e}")
+        return []
+    payload_id = store_payload({
+        'photoprism_photo': photo_data,
+        'photoprism_file': file_data,
+    })
+
+    photos = []
+    for person, matching_marker in missing.items():
+        photo = build_photoprism_photo(person, photo_data, file_hash, file_data, matching_marker)
+        attach_blob(photo, blob)
+        photo.payload_id = payload_id
+        photo.save()
+        logger.info(f"Imported photo {file_hash} for {person.name}")
+        photos.append(photo)
+    return photos
+
+
+def build_photoprism_photo(person, photo_data, file_hash, file_data, matching_marker):
+    """
+    Unsaved Photo of `person` for a PhotoPrism file.
+    """
     # Parse photo date
     photo_date = None
     taken_at = photo_data.get('TakenAt')
@@ -324,12 +634,7 @@ def process_single_photo(person, photo_data, file_hash):
     }
 
     # Calculate age
-    age_years = None
-    age_months = None
-    if photo_date and person.birth_date:
-        delta = photo_date - person.birth_date
-        age_years = delta.days / 365.25
-        age_months = int(delta.days / 30.44)
+    age_years, age_months = age_at_photo(person.birth_date, photo_date)
 
     # Create Photo object
     photo = Photo(
@@ -338,18 +643,105 @@ def process_single_photo(person, photo_data, file_hash):
         source='photoprism',
         source_id=file_hash,
         person_face_box=person_face_box,
-        metadata={
-            'photoprism_photo': photo_data,
-            'photoprism_file': file_data,
-        },
+        metadata={'type': photo_data.get('Type')} if photo_data.get('Type') else {},
+        media_type=Photo.VIDEO if photo_data.get('Type') == 'video' else Photo.IMAGE,
         age_at_photo_years=age_years,
         age_at_photo_months=age_months,
     )
+    return photo
 
-    # Save the image file
-    filename = f"{file_hash}.jpg"
-    photo.file_path.save(filename, ContentFile(photo_content), save=False)
-    photo.save()
-    
-    logger.info(f"Imported photo {file_hash} for {person.name}")
-    return True
\ No newline at end of file
+
+@shared_task
+def prune_derivative_cache():
+    """
+    Evict least recently used photo derivatives once the cache is over its
+    disk budget.
+    """
+    removed, remaining = prune_derivatives()
+    return f"Pruned {removed} derivatives, {remaining} bytes left"
+
+
+@shared_task
+def build_face_crops(photo_ids):
+    """
+    Precompute the face-centred crops served by photo_proxy?crop=face.
+    """
+    built = 0
+    for photo in Photo.objects.filter(id__in=photo_ids):
+        try:
+            built += precompute_face_crops(photo)
+        except ValueError:
+            continue
+        except Exception as e:
+            logger.warning(f"Could not build face crops for photo {photo.id}: {e}")
+
+    if built and derivative_cache_over_budget():
+        prune_derivative_cache.delay()
+    return f"Built {built} face crops for {len(photo_ids)} photos"
+
+
+@shared_task
+def warm_derivatives(photo_ids, preset):
+    """
+    Render the `preset` derivatives of upcoming slideshow photos before the
+    browser asks for them.
+    """
+    built = 0
+    for photo in Photo.objects.filter(id__in=photo_ids):
+        try:
+            built += precompute_derivatives(photo, preset)
+        except Exception as e:
+            logger.warning(f"Could not warm {preset} derivative for photo {photo.id}: {e}")
+
+    if built and derivative_cache_over_budget():
+        prune_derivative_cache.delay()
+    return f"Built {built} {preset} derivatives for {len(photo_ids)} photos"
+
+
+@shared_task
+def collect_media_blobs():
+    """
+    Delete stored images that no photo refers to any more.
+    """
+    removed, freed = collect_orphan_blobs()
+    return f"Collected {removed} orphan blobs, {freed} bytes freed"
+
+
+@shared_task
+def collect_photo_payloads():
+    """
+    Delete raw upstream documents that no photo refers to any more.
+    """
+    removed = collect_orphan_payloads()
+    return f"Collected {removed} orphan payloads"
+
+
+@shared_task(bind=True)
+def import_upload_session(self, session_id):
+    """
+    Import a staged upload session in batches, reporting progress through
+    the task state. The staging directory is removed once the import ran.
+    """
+    def progress(stats, done, total):
+        self.update_state(state='PROGRESS', meta={'done': done, 'total': total, **stats})
+
+    json_data = load_manifest(session_id)
+    try:
+        stats = process_json_upload(
+            json_data, staged_files(session_id), progress=progress, on_batch=build_face_crops.delay
+        )
+    finally:
+        data_changed()
+
+    delete_upload_session(session_id)
+    logger.info(f"Upload session {session_id} imported: {stats['photos_created']} photos created, {len(stats['errors'])} errors")
+    return stats
+
+
+@shared_task
+def prune_upload_staging():
+    """
+    Remove upload sessions that were started but never committed.
+    """
+    removed = prune_upload_sessions()
+    return f"Removed {removed} stale upload sessions"
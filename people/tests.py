@@ -0,0 +1,65 @@
+import shutil
+import tempfile
+import uuid
+from datetime import date, timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from .blobs import collect_orphan_blobs, store_blob
+from .models import MediaBlob, Person, Photo
+from .tasks import save_photoprism_photos
+
+
+def jpeg_bytes():
+    buf = BytesIO()
+    Image.new('RGB', (8, 8), 'red').save(buf, 'JPEG')
+    return buf.getvalue()
+
+
+class PhotoprismBlobReuseTests(TestCase):
+    file_hash = 'a' * 40
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.person = Person.objects.create(
+            immich_id=uuid.uuid4(), name='Anna', birth_date=date(2015, 1, 1), updated_at=timezone.now()
+        )
+        self.photo_data = {'Hash': self.file_hash, 'TakenAt': '2016-01-01T00:00:00Z'}
+        self.file_data = {'Markers': [{'Name': 'Anna', 'X': 0.1, 'Y': 0.1, 'W': 0.2, 'H': 0.2}]}
+
+    def age_blobs(self):
+        MediaBlob.objects.update(last_seen=timezone.now() - timedelta(hours=2))
+
+    def test_blob_collected_after_diff_is_fetched_again(self):
+        store_blob(self.file_hash, jpeg_bytes())
+        # The page diff saw the blob, so the tile was not downloaded ...
+        self.age_blobs()
+        # ... and the collector removed it before the photo was saved
+        self.assertEqual(collect_orphan_blobs()[0], 1)
+
+        markers = {self.person: self.file_data['Markers'][0]}
+        with mock.patch('people.tasks.photoprism_get_raw', return_value=jpeg_bytes()) as get_raw:
+            photos = save_photoprism_photos(self.photo_data, self.file_hash, self.file_data, markers, None)
+
+        get_raw.assert_called_once()
+        self.assertEqual(len(photos), 1)
+        self.assertEqual(Photo.objects.get(id=photos[0].id).blob.key, self.file_hash)
+
+    def test_reused_blob_is_not_collected(self):
+        store_blob(self.file_hash, jpeg_bytes())
+        self.age_blobs()
+
+        blob, created = store_blob(self.file_hash, None)
+
+        self.assertFalse(created)
+        self.assertEqual(collect_orphan_blobs()[0], 0)
+        self.assertTrue(MediaBlob.objects.filter(id=blob.id).exists())
@@ -0,0 +1,540 @@
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import uuid
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+
+from .blobs import attach_blob, file_sha256, store_blob
+from .exif import read_image_header, read_image_headers
+from .models import Person, Photo
+from .utils import age_at_photo
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_NAME = "manifest.json"
+PART_SUFFIX = ".part"
+ARCHIVE_READ_SIZE = 64 * 1024
+
+
+def uploads_root():
+    return default_storage.path("uploads")
+
+
+def session_dir(session_id):
+    """
+    Staging directory of an upload session. Raises ValidationError for ids
+    that are not ours, so they can never point outside the uploads root.
+    """
+    try:
+        session_id = uuid.UUID(str(session_id)).hex
+    except ValueError:
+        raise ValidationError("Unknown upload session")
+    return os.path.join(uploads_root(), session_id)
+
+
+def expected_files(json_data):
+    """
+    File names referenced by the photos of an upload JSON.
+    """
+    if 'persons' not in json_data:
+        raise ValidationError("JSON needs a 'persons' array")
+    names = set()
+    for person_data in json_data['persons']:
+        for photo_data in person_data.get('photos', []):
+            if photo_data.get('filename'):
+                names.add(photo_data['filename'])
+    return names
+
+
+def create_upload_session(json_data):
+    """
+    Stage the upload JSON on disk so files can follow in chunks.
+    Returns tuple: (session_id, expected file names)
+    """
+    names = expected_files(json_data)
+    session_id = uuid.uuid4().hex
+    directory = session_dir(session_id)
+    os.makedirs(directory)
+    with open(os.path.join(directory, MANIFEST_NAME), "w") as f:
+        json.dump(json_data, f)
+    return session_id, sorted(names)
+
+
+def load_manifest(session_id):
+    path = os.path.join(session_dir(session_id), MANIFEST_NAME)
+    if not os.path.exists(path):
+        raise ValidationError("Unknown upload session")
+    with open(path) as f:
+        return json.load(f)
+
+
+def staged_path(session_id, filename):
+    """
+    Path of one staged file; only bare names from the manifest are allowed.
+    """
+    if not filename or os.path.basename(filename) != filename or filename in (".", "..", MANIFEST_NAME):
+        raise ValidationError(f"Invalid file name {filename!r}")
+    return os.path.join(session_dir(session_id), "files", filename)
+
+
+def received_bytes(session_id, filename):
+    """
+    Returns tuple: (bytes received so far, complete)
+    """
+    path = staged_path(session_id, filename)
+    if os.path.exists(path):
+        return os.path.getsize(path), True
+    if os.path.exists(path + PART_SUFFIX):
+        return os.path.getsize(path + PART_SUFFIX), False
+    return 0, False
+
+
+def append_chunk(session_id, filename, offset, total, chunk):
+    """
+    Write one chunk of a staged file. `offset` has to match what was received
+    so far, which lets a client resume by asking for the current size first.
+    The file is renamed into place once `total` bytes have arrived.
+    Returns tuple: (bytes received, complete)
+    """
+    if filename not in expected_files(load_manifest(session_id)):
+        raise ValidationError(f"File {filename} is not part of this upload")
+
+    received, complete = received_bytes(session_id, filename)
+    if complete:
+        return received, True
+    if offset != received:
+        return received, False
+
+    path = staged_path(session_id, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + PART_SUFFIX, "ab") as f:
+        for piece in chunk.chunks():
+            f.write(piece)
+        received = f.tell()
+
+    if received > total:
+        os.remove(path + PART_SUFFIX)
+        raise ValidationError(f"File {filename} is larger than announced")
+    if received == total:
+        os.replace(path + PART_SUFFIX, path)
+        return received, True
+    return received, False
+
+
+def session_status(session_id):
+    """
+    Received bytes per expected file, for clients resuming an upload.
+    """
+    files = {}
+    for filename in sorted(expected_files(load_manifest(session_id))):
+        received, complete = received_bytes(session_id, filename)
+        files[filename] = {'received': received, 'complete': complete}
+    return files
+
+
+def staged_files(session_id):
+    """
+    Completely received files of a session, as name -> path.
+    """
+    files = {}
+    for filename in expected_files(load_manifest(session_id)):
+        path = staged_path(session_id, filename)
+        if os.path.exists(path):
+            files[filename] = path
+    return files
+
+
+def delete_upload_session(session_id):
+    shutil.rmtree(session_dir(session_id), ignore_errors=True)
+
+
+def prune_upload_sessions(max_age=None):
+    """
+    Remove staging directories nobody touched for `max_age` seconds.
+    Returns number of removed sessions
+    """
+    if max_age is None:
+        max_age = settings.UPLOAD_SESSION_MAX_AGE
+    root = uploads_root()
+    if not os.path.isdir(root):
+        return 0
+
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(root):
+        if entry.is_dir() and entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+@contextmanager
+def open_upload(upload):
+    """
+    Uploaded files come either from the request or as staged paths on disk.
+    """
+    if isinstance(upload, str):
+        with open(upload, "rb") as f:
+            yield File(f, name=os.path.basename(upload))
+    else:
+        yield upload
+
+
+def upload_digest(upload):
+    with open_upload(upload) as f:
+        return file_sha256(f)
+
+
+def find_uploaded_photos(filenames, digests):
+    """
+    Identities already stored for the files of an upload, in one indexed
+    query.
+    Returns set of (person name, file name) and (person name, sha256)
+    """
+    rows = Photo.objects.filter(
+        Q(original_filename__in=[name for name in filenames if name]) |
+        Q(content_sha256__in=[digest for digest in digests if digest])
+    ).values_list('person__name', 'original_filename', 'content_sha256')
+
+    known = set()
+    for person_name, filename, digest in rows:
+        if filename:
+            known.add((person_name, filename))
+        if digest:
+            known.add((person_name, digest))
+    return known
+
+
+def new_upload_stats():
+    return {
+        'persons_created': 0,
+        'persons_updated': 0,
+        'photos_created': 0,
+        'photos_skipped': 0,
+        'errors': []
+    }
+
+
+def plan_upload(json_data, stats):
+    """
+    Group the photos of an upload JSON by the file they refer to, so every
+    file is read once however many persons it shows.
+    Returns tuple: ({filename: [(person_data, photo_data)]}, persons without photos)
+    """
+    if 'persons' not in json_data:
+        raise ValidationError("JSON needs a 'persons' array")
+
+    references = {}
+    bare_persons = []
+    for person_data in json_data['persons']:
+        if 'birth_date' not in person_data:
+            stats['errors'].append(f"Person without birth_date was skipped")
+            continue
+        photos = person_data.get('photos', [])
+        if not photos:
+            bare_persons.append(person_data)
+        for photo_data in photos:
+            filename = photo_data.get('filename')
+            if not filename:
+                stats['errors'].append(f"Photo without filename for {person_data.get('name', '')}")
+                continue
+            references.setdefault(filename, []).append((person_data, photo_data))
+    return references, bare_persons
+
+
+def resolve_upload_person(person_data, persons, stats):
+    """
+    Existing person by name, or a new one. `persons` caches what this
+    upload already resolved so counts stay per person, not per photo.
+    """
+    person_name = person_data.get('name', '')
+    if person_name in persons:
+        return persons[person_name]
+
+    person = Person.objects.filter(name=person_name).first()
+    if person:
+        stats['persons_updated'] += 1
+    else:
+        person = Person.objects.create(
+            immich_id=uuid.uuid4(),
+            name=person_name,
+            birth_date=person_data['birth_date'],
+            thumbnail_path='',
+            updated_at=datetime.now()
+        )
+        stats['persons_created'] += 1
+    persons[person_name] = person
+    return person
+
+
+def resolve_bare_persons(bare_persons, persons, stats):
+    """
+    Persons listed without photos still get created.
+    """
+    with transaction.atomic():
+        for person_data in bare_persons:
+            try:
+                resolve_upload_person(person_data, persons, stats)
+            except Exception as e:
+                stats['errors'].append(f"Error at person: {str(e)}")
+
+
+def ingest_upload_photo(person, person_data, photo_data, upload, filename, digest, header=None):
+    """
+    Create the Photo of one uploaded file for a person. Date and size
+    missing from the JSON come from the image `header`.
+    """
+    taken, header_width, header_height = header or (None, None, None)
+
+    photo_date = photo_data.get('photo_date') or (taken.isoformat() if taken else None)
+
+    age_years = None
+    age_months = None
+    if photo_date:
+        photo_date_obj = datetime.strptime(photo_date, '%Y-%m-%d').date()
+        birth_date_obj = datetime.strptime(str(person_data['birth_date']), '%Y-%m-%d').date()
+        age_years, age_months = age_at_photo(birth_date_obj, photo_date_obj, calendar=True)
+
+    width = photo_data.get('width') or header_width or 1920
+    height = photo_data.get('height') or header_height or 1080
+    person_face_box = [0, 0, width, height]
+
+    source_id = f"own_json_{uuid.uuid4().hex[:12]}"
+
+    photo = Photo(
+        person=person,
+        photo_date=photo_date,
+        source='own_json',
+        source_id=source_id,
+        person_face_box=person_face_box,
+        original_filename=filename,
+        content_sha256=digest,
+        metadata={},
+        media_type=Photo.IMAGE,
+        age_at_photo_years=age_years,
+        age_at_photo_months=age_months
+    )
+
+    # One stored file per distinct image, shared across persons
+    extension = os.path.splitext(filename)[1].lstrip('.') or 'jpg'
+    with open_upload(upload) as f:
+        blob, _ = store_blob(digest, f, extension)
+    attach_blob(photo, blob)
+    photo.save()
+    return photo
+
+
+def ingest_upload_file(references, upload, filename, digest, persons, known, stats, header=None):
+    """
+    Create the photos of one uploaded file for every person it belongs to,
+    skipping persons that already have it by name or content.
+    Returns list of created photo ids
+    """
+    created_ids = []
+    for person_data, photo_data in references:
+        try:
+            person = resolve_upload_person(person_data, persons, stats)
+        except Exception as e:
+            stats['errors'].append(f"Error at person: {str(e)}")
+            continue
+
+        try:
+            if (person.name, filename) in known or (person.name, digest) in known:
+                stats['photos_skipped'] += 1
+                continue
+
+            with transaction.atomic():
+                photo = ingest_upload_photo(person, person_data, photo_data, upload, filename, digest, header)
+
+            stats['photos_created'] += 1
+            created_ids.append(photo.id)
+            known.update({(person.name, filename), (person.name, digest)})
+
+        except Exception as e:
+            stats['errors'].append(f"Error at photo {filename} for {person.name}: {str(e)}")
+    return created_ids
+
+
+def needs_header(references):
+    return any(
+        not (photo_data.get('photo_date') and photo_data.get('width') and photo_data.get('height'))
+        for _, photo_data in references
+    )
+
+
+def header_source(upload):
+    """
+    What a header worker process can open: a path on disk, else the bytes
+    of a small in-memory upload.
+    """
+    if isinstance(upload, str):
+        return upload
+    if hasattr(upload, 'temporary_file_path'):
+        return upload.temporary_file_path()
+    with open_upload(upload) as f:
+        data = f.read()
+        f.seek(0)
+    return data
+
+
+def report_missing_files(references, found, stats):
+    for filename, refs in references.items():
+        if filename not in found:
+            for _ in refs:
+                stats['errors'].append(f"File {filename} not found in upload")
+
+
+def process_json_upload(json_data, uploaded_files, batch_size=None, progress=None, on_batch=None):
+    """
+    Import an upload JSON with its files, committing every `batch_size`
+    files. `uploaded_files` maps file name to an uploaded file or a staged
+    path. `progress(stats, done, total)` runs after each batch and
+    `on_batch(photo_ids)` receives the ids each batch created.
+    Returns stats dict
+    """
+    stats = new_upload_stats()
+    references, bare_persons = plan_upload(json_data, stats)
+
+    if batch_size is None:
+        batch_size = settings.UPLOAD_IMPORT_BATCH_SIZE
+
+    persons = {}
+    resolve_bare_persons(bare_persons, persons, stats)
+    report_missing_files(references, uploaded_files, stats)
+
+    # Hash every file once and look up all known identities in one query
+    filenames = [name for name in references if name in uploaded_files]
+    digests = {name: upload_digest(uploaded_files[name]) for name in filenames}
+    known = find_uploaded_photos(filenames, digests.values())
+
+    # Capture dates and real sizes for files the JSON leaves them out for
+    headers = read_image_headers({
+        name: header_source(uploaded_files[name])
+        for name in filenames if needs_header(references[name])
+    })
+
+    for start in range(0, len(filenames), batch_size):
+        created_ids = []
+        with transaction.atomic():
+            for filename in filenames[start:start + batch_size]:
+                created_ids += ingest_upload_file(
+                    references[filename], uploaded_files[filename], filename,
+                    digests[filename], persons, known, stats, headers.get(filename)
+                )
+
+        if created_ids and on_batch:
+            on_batch(created_ids)
+        if progress:
+            progress(stats, min(start + batch_size, len(filenames)), len(filenames))
+
+    return stats
+
+
+def archive_members(fileobj):
+    """
+    Yield (name, readable) for the regular files of a ZIP or tar archive,
+    one at a time. Tar archives (plain or compressed) are read strictly
+    forward so they can come straight from the request body; ZIP needs a
+    seekable file for its central directory.
+    """
+    seekable = getattr(fileobj, 'seekable', lambda: False)()
+    if seekable and zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            infos = [info for info in archive.infolist() if not info.is_dir()]
+            # The manifest goes first, like in a tar built for streaming
+            infos.sort(key=lambda info: not info.filename.endswith('.json'))
+            for info in infos:
+                with archive.open(info) as member:
+                    yield info.filename, member
+        return
+
+    if seekable:
+        fileobj.seek(0)
+    with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+        for info in archive:
+            if info.isfile():
+                yield info.name, archive.extractfile(info)
+
+
+def spool_member(member, filename):
+    """
+    Copy one archive member into a spooled file while hashing it; small
+    files stay in memory, larger ones roll over to a temporary file.
+    Returns tuple: (File, sha256)
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    digest = hashlib.sha256()
+    for piece in iter(lambda: member.read(ARCHIVE_READ_SIZE), b''):
+        digest.update(piece)
+        spool.write(piece)
+    spool.seek(0)
+    return File(spool, name=filename), digest.hexdigest()
+
+
+def import_upload_archive(fileobj, on_batch=None):
+    """
+    Import a ZIP or tar archive holding the upload JSON and its images,
+    member by member. The JSON has to be the first file of a tar archive.
+    Only one image is held at a time, so memory stays flat whatever the
+    archive size.
+    Returns stats dict
+    """
+    stats = new_upload_stats()
+    members = archive_members(fileobj)
+
+    try:
+        manifest_name, manifest = next(members)
+    except (StopIteration, tarfile.TarError, zipfile.BadZipFile):
+        raise ValidationError("Not a ZIP or tar archive with an upload JSON")
+    if not manifest_name.endswith('.json'):
+        raise ValidationError("The archive has to start with the upload JSON")
+    try:
+        json_data = json.load(manifest)
+    except ValueError as e:
+        raise ValidationError(f"Invalid upload JSON: {e}")
+
+    references, bare_persons = plan_upload(json_data, stats)
+    persons = {}
+    resolve_bare_persons(bare_persons, persons, stats)
+    known = find_uploaded_photos(references.keys(), [])
+
+    found = set()
+    try:
+        for member_name, member in members:
+            filename = os.path.basename(member_name)
+            if filename not in references or filename in found:
+                continue
+            found.add(filename)
+
+            upload, digest = spool_member(member, filename)
+            with upload:
+                known |= find_uploaded_photos([], [digest])
+                header = read_image_header(upload) if needs_header(references[filename]) else None
+                with transaction.atomic():
+                    created_ids = ingest_upload_file(
+                        references[filename], upload, filename, digest, persons, known, stats, header
+                    )
+            if created_ids and on_batch:
+                on_batch(created_ids)
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError) as e:
+        stats['errors'].append(f"Archive is damaged: {str(e)}")
+
+    report_missing_files(references, found, stats)
+    return stats
@@ -0,0 +1,132 @@
+"""
+Shared HTTP client for Immich and PhotoPrism: one pooled keep-alive session
+per process, with jittered exponential backoff on 429/5xx.
+"""
+import logging
+import os
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_stats = defaultdict(lambda: {"requests": 0, "errors": 0, "bytes": 0, "seconds": 0.0})
+
+
+def _record(response, *args, **kwargs):
+    host = urlsplit(response.url).netloc
+    if kwargs.get("stream"):
+        size = int(response.headers.get("Content-Length") or 0)
+    else:
+        size = len(response.content)
+
+    with _lock:
+        stats = _stats[host]
+        stats["requests"] += 1
+        stats["bytes"] += size
+        stats["seconds"] += response.elapsed.total_seconds()
+        if response.status_code >= 400:
+            stats["errors"] += 1
+
+
+def _build_session():
+    retry = Retry(
+        total=settings.UPSTREAM_MAX_RETRIES,
+        backoff_factor=settings.UPSTREAM_BACKOFF_FACTOR,
+        backoff_jitter=settings.UPSTREAM_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        # Our POSTs (/search/metadata) are read-only searches, safe to repeat
+        allowed_methods=None,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.UPSTREAM_POOL_SIZE,
+        pool_maxsize=settings.UPSTREAM_POOL_SIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_record)
+    return session
+
+
+def get_session():
+    """
+    Return the session of this process.
+    A new one is built after a fork (Celery prefork, gunicorn workers) so
+    processes never share sockets.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+                _stats.clear()
+    return _session
+
+
+def request(method, url, **kwargs):
+    kwargs.setdefault("timeout", settings.UPSTREAM_TIMEOUT)
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def is_transient(exc):
+    """
+    True for errors a later attempt may get past: connection problems,
+    timeouts and 429/5xx answers. Other 4xx answers and data errors repeat.
+    """
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code in RETRY_STATUSES
+    return isinstance(exc, requests.RequestException)
+
+
+def upstream_stats():
+    """
+    Per-host counters of this process: requests, errors, bytes and the
+    total seconds spent waiting for response headers. Counters inherited
+    from a parent process are not reported.
+    """
+    with _lock:
+        if _session_pid != os.getpid():
+            return {}
+        return {host: dict(stats) for host, stats in _stats.items()}
+
+
+def log_upstream_stats(since=None):
+    """
+    Log what the counters grew by since `since`, a snapshot taken with
+    upstream_stats() when the task started, as they are never reset.
+    """
+    since = since or {}
+    for host, stats in upstream_stats().items():
+        before = since.get(host, {})
+        stats = {key: value - before.get(key, 0) for key, value in stats.items()}
+        if not stats["requests"]:
+            continue
+        average = stats["seconds"] / stats["requests"]
+        logger.info(
+            f"Upstream {host}: {stats['requests']} requests, {stats['errors']} errors, "
+            f"{stats['bytes']} bytes, {average:.3f}s average latency"
+        )
@@ -4,6 +4,9 @@ from .views import (
     PersonDetailView,
     PhotosSameAgeView,
     get_same_age_lane,
+    get_common_months,
+    get_month_photos,
+    get_slideshow_playlist,
     photo_proxy,
     list_tasks,
     update_task,
@@ -11,19 +14,30 @@ from .views import (
     task_status,
     task_schedule,
     upload_json_view,
+    upload_archive_view,
+    upload_session_create,
+    upload_session_detail,
+    upload_session_commit,
 )
 
 urlpatterns = [
     path("people/", PersonListView.as_view(), name="people"),
     path("people/<int:pk>/", PersonDetailView.as_view(), name="person-detail"),
     path("photos/same_age/", PhotosSameAgeView.as_view(), name="photos-same-age"),
-    path("photos/proxy/<int:photo_id>/", photo_proxy),
+    path("photos/proxy/<int:photo_id>/", photo_proxy, name="photo-proxy"),
     path('sameagelane/', get_same_age_lane, name='sameagelane'),
+    path('sameagelane/common-months/', get_common_months, name='sameagelane-common-months'),
+    path('sameagelane/month/<int:month>/', get_month_photos, name='sameagelane-month'),
+    path('slideshow/playlist/', get_slideshow_playlist, name='slideshow-playlist'),
     path("tasks/", list_tasks, name='list_tasks'),
     path('tasks/<int:task_id>/', update_task, name='update_task'), 
     path('tasks/<int:task_id>/schedule/', task_schedule, name='task_schedule'),
     path("tasks/run/<str:task_name>/", run_task, name='run_task'),
     path("tasks/status/<str:task_id>/", task_status, name="task_status"),
     path('upload-json/', upload_json_view, name='upload-json'),
+    path('upload-archive/', upload_archive_view, name='upload-archive'),
+    path('upload-sessions/', upload_session_create, name='upload-session-create'),
+    path('upload-sessions/<str:session_id>/', upload_session_detail, name='upload-session-detail'),
+    path('upload-sessions/<str:session_id>/commit/', upload_session_commit, name='upload-session-commit'),
 ]
 
@@ -1,5 +1,8 @@
 from datetime import date
 
+from dateutil.relativedelta import relativedelta
+from django.db import connection, transaction
+
 def calculate_age(birth_date, reference_date):
     if not birth_date or not reference_date:
         return None
@@ -17,3 +20,29 @@ def calculate_age(birth_date, reference_date):
     return {"years": years, "months": months}
 
 
+
+
+def age_at_photo(birth_date, photo_date, calendar=False):
+    """
+    Age fields stored on a Photo. Synced photos count 30.44-day months,
+    uploads count calendar months.
+    Returns tuple: (years, months), both None without dates
+    """
+    if not birth_date or not photo_date:
+        return None, None
+
+    if calendar:
+        delta = relativedelta(photo_date, birth_date)
+        return delta.years + delta.months / 12.0, delta.years * 12 + delta.months
+
+    days = (photo_date - birth_date).days
+    return days / 365.25, int(days / 30.44)
+
+
+def on_commit_once(func):
+    """
+    transaction.on_commit, unless `func` already waits for this commit.
+    Outside a transaction `func` runs right away.
+    """
+    if not any(entry[1] is func for entry in connection.run_on_commit):
+        transaction.on_commit(func)
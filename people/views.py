@@ -2,18 +2,37 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 
-from django.db.models import Q
-from django.db.models import Count, Min, Max
+from django.db.models import F, Window
+from django.db.models.functions import Random, RowNumber
 
 from django.conf import settings
+from django.urls import reverse
 from django.utils.timezone import now
 
 from .models import Person, Photo
 from .serializers import PersonSerializer, PhotoSerializer
 from .utils import calculate_age
+from .cache import cached_by_data_version, data_changed, data_version_etag, dated_data_version_etag
+from .agelane import age_lanes, next_lane_month
+from .coverage import common_months, month_photo_sets, month_photos
+from . import upstream
+from .uploads import (
+    append_chunk,
+    create_upload_session,
+    import_upload_archive,
+    load_manifest,
+    process_json_upload,
+    session_status,
+)
+from .derivatives import (
+    DERIVATIVE_FORMATS,
+    DERIVATIVE_PRESETS,
+    derivative_cache_over_budget,
+    face_crop_key,
+    get_derivative,
+    get_face_crop,
+)
 
-import random
-from collections import defaultdict
 
 from rest_framework.decorators import api_view
 from django_celery_beat.models import PeriodicTask, CrontabSchedule, IntervalSchedule
@@ -21,33 +40,27 @@ from atsameage.celery import app
 
 from celery.result import AsyncResult
 
-from people.tasks import sync_people_and_photos
+from people.tasks import prune_derivative_cache, build_face_crops, import_upload_session, warm_derivatives
 
 import json
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
-import uuid
-import os
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
-from django.db import transaction
 from django.core.exceptions import ValidationError
-from django.core.files import File
-from django.core.files.storage import default_storage
 
-from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def people_list(request):
-    people = (
-        Person.objects
-        .annotate(
-            photo_count=Count("photos"),
-            earliest_photo=Min("photos__photo_date"),
-            latest_photo=Max("photos__photo_date")
-        )
-    )
+    people = Person.objects.all()
 
     result = []
     for p in people:
@@ -72,31 +85,45 @@ def people_list(request):
     return JsonResponse(result, safe=False)
 
 
+# Person responses are revalidated on every use and answered with a 304 as
+# long as neither the data version nor the date moved; age_in_days changes
+# daily without any write.
+revalidate_by_data_version_and_date = [
+    cache_control(no_cache=True),
+    condition(etag_func=dated_data_version_etag),
+]
+
+
+@method_decorator(revalidate_by_data_version_and_date, name="get")
 class PersonListView(ListAPIView):
     serializer_class = PersonSerializer
-    queryset = (
-        Person.objects
-        .annotate(
-            photo_count=Count("photos"),
-            earliest_photo=Min("photos__photo_date"),
-            latest_photo=Max("photos__photo_date"),
+    # Photo statistics are stored on Person, so this is a single-table read
+    queryset = Person.objects.order_by("-birth_date")
+
+    def list(self, request, *args, **kwargs):
+        # age_in_days moves daily, so the date is part of the key
+        data = cached_by_data_version(
+            "people", [now().date()], lambda: self.get_serializer(self.get_queryset(), many=True).data
         )
-        .order_by("-birth_date") 
-    )
+        return Response(data)
 
+@method_decorator(revalidate_by_data_version_and_date, name="get")
 class PersonDetailView(RetrieveAPIView):
-    queryset = (
-        Person.objects
-        .annotate(
-            photo_count=Count("photos"),
-            earliest_photo=Min("photos__photo_date"),
-            latest_photo=Max("photos__photo_date"),
-        )
-    )
+    queryset = Person.objects.all()
     serializer_class = PersonSerializer
 
     
 
+# Columns PhotoSerializer reads; the rest of a Photo row is never loaded
+SAME_AGE_PHOTO_FIELDS = (
+    "id", "file_path", "remote_url", "photo_date", "metadata", "person_face_box",
+    "age_at_photo_years", "age_at_photo_months", "source", "source_id",
+    "person__name", "person__birth_date",
+)
+
+
+# The pick is random, so a conditional GET must never be answered with a 304
+@method_decorator(cache_control(no_store=True), name="get")
 class PhotosSameAgeView(APIView):
     def get(self, request):
         try:
@@ -120,65 +147,81 @@ class PhotosSameAgeView(APIView):
         if person_ids:
             qs = qs.filter(person_id__in=person_ids)
 
-        qs = qs.filter(
-            Q(metadata__isnull=True) | 
-            ~Q(metadata__has_key='type') |   
-            ~Q(metadata__type="VIDEO")
-        )
-        photos = qs.order_by("age_at_photo_months")
+        qs = qs.filter(media_type=Photo.IMAGE)
+        # Not cached: every request should get a fresh random pick
+        return Response(self.pick_photos(request, qs))
 
-        grouped = defaultdict(list)
-        for photo in photos:
-            grouped[photo.person_id].append(photo)
+    def pick_photos(self, request, qs):
+        # One random photo per person, picked by the database. A window
+        # over a random key works on Postgres and SQLite alike.
+        photos = (
+            qs.annotate(
+                pick=Window(RowNumber(), partition_by=F("person_id"), order_by=Random())
+            )
+            .filter(pick=1)
+            .select_related("person")
+            .only(*SAME_AGE_PHOTO_FIELDS)
+            .order_by("-person__birth_date")
+        )
 
-        selected = [random.choice(photo_list) for photo_list in grouped.values()]
+        return PhotoSerializer(photos, many=True, context={'request': request}).data
 
-        selected.sort(key=lambda photo: photo.person.birth_date, reverse=True) 
-
-        return Response(PhotoSerializer(selected, many=True, context={'request': request}).data)
-
-def get_photos_per_month(person):
-    photos = person.photos.order_by('age_at_photo_months')
-    
-    photos_by_month = {}
-    
-    for photo in photos:
-        month = photo.age_at_photo_months
-        if month is None or month < 0:  
-            continue
-        if month not in photos_by_month:
-            photos_by_month[month] = {
-                "age_in_months": month,
-                "photo": {
-                    "id": photo.id,
-                    "url": photo.remote_url or "",
-                    "source": photo.source,
-                    "source_id": photo.source_id,
-                    "person_face_box": photo.person_face_box  
-                }
-            }
-    
-    return [photos_by_month[m] for m in sorted(photos_by_month.keys())]
+LANE_WINDOW_PARAMS = ("from_month", "to_month", "cursor", "limit")
+LANE_PAGE_SIZE = 24
+LANE_MAX_PAGE_SIZE = 240
 
 
+@cache_control(no_cache=True)
+@condition(etag_func=data_version_etag)
 @api_view(['GET'])
 def get_same_age_lane(request):
     people_param = request.query_params.get("people", None)
 
-    cache_key = f'sameagelane_{people_param or "all"}'
-    
-    cached_data = cache.get(cache_key)
-    if cached_data is not None:
-        return Response(cached_data)
-
     if people_param:
         try:
             people_ids = [int(p.strip()) for p in people_param.split(",")]
         except ValueError:
             return Response({"error": "Invalid people parameter"}, status=400)
-        people = Person.objects.filter(id__in=people_ids).prefetch_related('photos').order_by('-birth_date')
     else:
-        people = Person.objects.prefetch_related('photos').all().order_by('-birth_date')
+        people_ids = None
+
+    # Without window parameters the full lanes keep their original shape
+    if not any(param in request.query_params for param in LANE_WINDOW_PARAMS):
+        data = cached_by_data_version(
+            "sameagelane", [people_param or "all"], lambda: build_same_age_lane(people_ids)
+        )
+        return Response(data)
+
+    try:
+        window = {
+            param: int(request.query_params[param])
+            for param in LANE_WINDOW_PARAMS if request.query_params.get(param, "") != ""
+        }
+    except ValueError:
+        return Response({"error": "from_month, to_month, cursor and limit must be integers"}, status=400)
+
+    limit = min(max(window.get("limit", LANE_PAGE_SIZE), 1), LANE_MAX_PAGE_SIZE)
+    to_month = window.get("to_month")
+    start = max(window.get("cursor", 0), window.get("from_month", 0))
+    end = start + limit - 1
+    if to_month is not None:
+        end = min(end, to_month)
+
+    data = cached_by_data_version(
+        "sameagelane", [people_param or "all", start, end, to_month],
+        lambda: build_same_age_lane_page(people_ids, start, end, to_month),
+    )
+    return Response(data)
+
+
+def build_same_age_lane(people_ids, from_month=None, to_month=None):
+    if people_ids is not None:
+        people = Person.objects.filter(id__in=people_ids).order_by('-birth_date')
+    else:
+        people = Person.objects.all().order_by('-birth_date')
+
+    people = list(people.only('id', 'name', 'birth_date'))
+    lanes = age_lanes([person.id for person in people], from_month, to_month)
 
     data = []
     for person in people:
@@ -186,34 +229,254 @@ def get_same_age_lane(request):
             "person_id": person.id,
             "person": person.name,
             "birth_date": person.birth_date,
-            "agelane": get_photos_per_month(person)
+            "agelane": lanes[person.id]
         })
+    return data
+
+
+def build_same_age_lane_page(people_ids, start, end, to_month):
+    """
+    Lanes for the months start..end plus the cursor of the next page.
+    """
+    results = build_same_age_lane(people_ids, start, end)
+    next_cursor = None
+    if to_month is None or end < to_month:
+        next_cursor = next_lane_month([lane["person_id"] for lane in results], end + 1, to_month)
+    return {
+        "from_month": start,
+        "to_month": end,
+        "next_cursor": next_cursor,
+        "results": results,
+    }
 
-    cache.set(cache_key, data, 60 * 15)
 
-    return Response(data)
+def selected_people(request):
+    """
+    Person ids from ?people=1,2,3, or every person without the parameter.
+    Raises ValueError on anything that is not a list of ids.
+    """
+    people_param = request.query_params.get("people", None)
+    if people_param:
+        return [int(p.strip()) for p in people_param.split(",")]
+    return list(Person.objects.order_by('-birth_date').values_list('id', flat=True))
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=data_version_etag)
+@api_view(['GET'])
+def get_common_months(request):
+    """
+    Months of age in which every selected person has a photo, from the
+    cached per-person coverage bitmaps.
+    """
+    try:
+        people_ids = selected_people(request)
+    except ValueError:
+        return Response({"error": "Invalid people parameter"}, status=400)
+
+    return Response({"people": people_ids, "months": common_months(people_ids)})
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=data_version_etag)
+@api_view(['GET'])
+def get_month_photos(request, month):
+    """
+    Lane photo of every selected person for one month of age.
+    """
+    try:
+        people_ids = selected_people(request)
+    except ValueError:
+        return Response({"error": "Invalid people parameter"}, status=400)
+
+    return Response(month_photos(people_ids, month))
+
+
+PLAYLIST_LENGTH = 6
+PLAYLIST_MAX_LENGTH = 60
+
+
+@cache_control(no_cache=True)
+@api_view(['GET'])
+def get_slideshow_playlist(request):
+    """
+    The next `count` slideshow frames from `from_month` on: months in which
+    every selected person has a photo, each with the photo ids, derivative
+    URLs in `size` and face boxes. With warm=1 the derivatives are rendered
+    in the background so the browser finds them ready.
+    """
+    try:
+        people_ids = selected_people(request)
+        from_month = int(request.query_params.get("from_month", 0))
+        count = int(request.query_params.get("count", PLAYLIST_LENGTH))
+    except ValueError:
+        return Response({"error": "people, from_month and count must be integers"}, status=400)
+
+    size = request.query_params.get("size", "screen")
+    if size not in DERIVATIVE_PRESETS:
+        return Response({"error": f"size must be one of {', '.join(DERIVATIVE_PRESETS)}"}, status=400)
+    count = min(max(count, 1), PLAYLIST_MAX_LENGTH)
+
+    upcoming = [month for month in common_months(people_ids) if month >= from_month]
+    months = upcoming[:count]
+    sets = month_photo_sets(people_ids, months)
+
+    frames = []
+    photo_ids = []
+    for month in months:
+        photos = []
+        for entry in sets[month]:
+            photo = entry["photo"]
+            photo_ids.append(photo["id"])
+            photos.append({
+                "person_id": entry["person_id"],
+                "person": entry["person"],
+                "photo_id": photo["id"],
+                "url": request.build_absolute_uri(
+                    f"{reverse('photo-proxy', args=[photo['id']])}?size={size}"
+                ),
+                "person_face_box": photo["person_face_box"],
+            })
+        frames.append({"age_in_months": month, "photos": photos})
+
+    if photo_ids and request.query_params.get("warm") in ("1", "true"):
+        warm_derivatives.delay(photo_ids, size)
+
+    return Response({
+        "frames": frames,
+        "next_month": upcoming[count] if len(upcoming) > count else None,
+    })
+
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+PROXY_CHUNK_SIZE = 64 * 1024
+PROXY_PASSTHROUGH_HEADERS = ("Content-Length", "Content-Range", "Accept-Ranges")
+
+
+def stream_upstream(response):
+    try:
+        yield from response.iter_content(chunk_size=PROXY_CHUNK_SIZE)
+    finally:
+        response.close()
+
+
+# Photo bytes never change for a given ETag, so browsers may keep them
+PHOTO_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def photo_etag(photo, variant):
+    """
+    Strong validator for the bytes photo_proxy serves: the source identity,
+    the upstream checksum (or stored file name) and the variant served.
+    """
+    checksum = (photo.metadata or {}).get("checksum") or (photo.file_path.name if photo.file_path else "")
+    digest = hashlib.sha1(f"{photo.source}:{photo.source_id}:{checksum}:{variant}".encode()).hexdigest()
+    return f'"{digest}"'
 
 
-from django.http import HttpResponse
-import requests
+def derivative_format(request):
+    accept = request.META.get("HTTP_ACCEPT", "")
+    return "webp" if "image/webp" in accept else "jpeg"
+
+
+def derivative_response(request, photo, preset, fmt, crop=None):
+    try:
+        if crop == "face":
+            try:
+                f, created = get_face_crop(photo, preset, fmt)
+            except ValueError:
+                # No usable face box, fall back to the whole photo
+                f, created = get_derivative(photo, preset, fmt)
+        else:
+            f, created = get_derivative(photo, preset, fmt)
+    except Exception as e:
+        logger.warning(f"Could not build {preset} derivative for photo {photo.id}: {e}")
+        return HttpResponse(status=502)
+
+    if created and derivative_cache_over_budget():
+        prune_derivative_cache.delay()
+
+    _, _, content_type = DERIVATIVE_FORMATS[fmt]
+    return FileResponse(f, content_type=content_type)
+
 
 def photo_proxy(request, photo_id):
     try:
         photo = Photo.objects.get(id=photo_id)
     except Photo.DoesNotExist:
         return HttpResponse(status=404)
-    
+
+    preset = request.GET.get("size")
+    crop = request.GET.get("crop")
+    if crop not in (None, "face"):
+        return HttpResponse(status=400)
+    if crop and not preset:
+        preset = "tile"
+    if preset and preset not in DERIVATIVE_PRESETS:
+        return HttpResponse(status=400)
+    fmt = derivative_format(request) if preset else None
+
+    if crop:
+        variant = f"face.{face_crop_key(photo)}.{preset}.{fmt}"
+    elif preset:
+        variant = f"{preset}.{fmt}"
+    else:
+        variant = "original"
+    etag = photo_etag(photo, variant)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = serve_photo(request, photo, preset, fmt, crop)
+
+    if response.status_code in (200, 206, 302, 304):
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, max_age=PHOTO_CACHE_MAX_AGE, immutable=True)
+        if preset:
+            response["Vary"] = "Accept"
+    return response
+
+
+def serve_photo(request, photo, preset, fmt, crop=None):
+    if preset:
+        if photo.source in ('own_json', 'photoprism') and not photo.file_path:
+            return HttpResponse(status=404)
+        return derivative_response(request, photo, preset, fmt, crop)
+
     if photo.source == 'own_json' or photo.source == 'photoprism':
         if photo.file_path:
             from django.shortcuts import redirect
             return redirect(photo.file_path.url)
         return HttpResponse(status=404)
     else:
-        headers = {"x-api-key": f"{settings.IMMICH_API_KEY}"}
+        # Stream the original instead of buffering it, so memory stays flat
+        # however large the asset is. Range requests are passed through.
+        headers = {
+            "x-api-key": f"{settings.IMMICH_API_KEY}",
+            "Accept-Encoding": "identity",
+        }
+        if "HTTP_RANGE" in request.META:
+            headers["Range"] = request.META["HTTP_RANGE"]
+
         url = f"{settings.IMMICH_API_URL}/assets/{photo.source_id}/original"
-        r = requests.get(url, headers=headers)
-        if r.status_code == 200:
-            return HttpResponse(r.content, content_type=r.headers["Content-Type"])
+        r = upstream.get(url, headers=headers, stream=True)
+        if r.status_code in (200, 206):
+            response = StreamingHttpResponse(
+                stream_upstream(r),
+                status=r.status_code,
+                content_type=r.headers.get("Content-Type", "application/octet-stream"),
+            )
+            for header in PROXY_PASSTHROUGH_HEADERS:
+                if header in r.headers:
+                    response[header] = r.headers[header]
+            return response
+
+        if r.status_code == 416 and "Content-Range" in r.headers:
+            r.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = r.headers["Content-Range"]
+            return response
+
+        r.close()
         return HttpResponse(status=r.status_code)
 
 @api_view(['GET'])
@@ -339,7 +602,8 @@ def task_schedule(request, task_id):
 
 @api_view(['POST'])
 def run_task(request, task_name):
-    result = app.send_task(task_name)
+    kwargs = request.data.get('kwargs') or {}
+    result = app.send_task(task_name, kwargs=kwargs)
     try:
         pt = PeriodicTask.objects.get(task=task_name)
         pt.last_run_at = now()
@@ -352,117 +616,10 @@ def run_task(request, task_name):
 @api_view(['GET'])
 def task_status(request, task_id):
     result = AsyncResult(task_id)
-    return JsonResponse({"task_id": task_id, "status": result.status})
-
-def process_json_upload(json_data, uploaded_files):
-    stats = {
-        'persons_created': 0,
-        'persons_updated': 0,
-        'photos_created': 0,
-        'photos_skipped': 0,
-        'errors': []
-    }
-    
-    if 'persons' not in json_data:
-        raise ValidationError("JSON needs a 'persons' array")
-    
-    with transaction.atomic():
-        for person_data in json_data['persons']:
-            try:
-                if 'birth_date' not in person_data:
-                    stats['errors'].append(f"Person without birth_date was skipped")
-                    continue
-                
-                person_name = person_data.get('name', '')
-                
-                person = Person.objects.filter(name=person_name).first()
-                
-                if person:
-                    stats['persons_updated'] += 1
-                else:
-                    person = Person.objects.create(
-                        immich_id=uuid.uuid4(),
-                        name=person_name,
-                        birth_date=person_data['birth_date'],
-                        thumbnail_path='',
-                        updated_at=datetime.now()
-                    )
-                    stats['persons_created'] += 1
-                
-                photos = person_data.get('photos', [])
-                for photo_data in photos:
-                    try:
-                        filename = photo_data.get('filename')
-                        
-                        if not filename:
-                            stats['errors'].append(f"Photo without filename for {person.name}")
-                            continue
-                            
-                        if filename not in uploaded_files:
-                            stats['errors'].append(f"File {filename} not found in upload")
-                            continue
-                        
-                        existing_photo = Photo.objects.filter(
-                            file_path__icontains=filename
-                        ).first()
-                        
-                        if existing_photo:
-                            stats['photos_skipped'] += 1
-                            continue 
-                        
-                        photo_date = photo_data.get('photo_date')
-                        
-                        age_years = None
-                        age_months = None
-                        if photo_date:
-                            photo_date_obj = datetime.strptime(photo_date, '%Y-%m-%d').date()
-                            birth_date_obj = datetime.strptime(person_data['birth_date'], '%Y-%m-%d').date()
-                            
-                            delta = relativedelta(photo_date_obj, birth_date_obj)
-                            age_years = delta.years + delta.months / 12.0
-                            age_months = delta.years * 12 + delta.months
-                        
-                        width = photo_data.get('width', 1920)
-                        height = photo_data.get('height', 1080)
-                        person_face_box = [0, 0, width, height]
-                        
-                        source_id = f"own_json_{uuid.uuid4().hex[:12]}"
-                        
-                        photo = Photo(
-                            person=person,
-                            photo_date=photo_date,
-                            source='own_json',
-                            source_id=source_id,
-                            person_face_box=person_face_box,
-                            metadata={},
-                            age_at_photo_years=age_years,
-                            age_at_photo_months=age_months
-                        )
-                        
-                        photo.file_path.save(filename, uploaded_files[filename], save=False)
-                        photo.save()
-                        
-                        stats['photos_created'] += 1
-                        
-                    except Exception as e:
-                        stats['errors'].append(f"Error at photo {filename} for {person.name}: {str(e)}")
-                        
-            except Exception as e:
-                stats['errors'].append(f"Error at person: {str(e)}")
-
-    try:
-        if hasattr(cache, 'delete_pattern'):
-            cache.delete_pattern('sameagelane_*')
-        else:
-            from django_redis import get_redis_connection
-            redis_conn = get_redis_connection('default')
-            keys = redis_conn.keys('sameagelane_*')
-            if keys:
-                redis_conn.delete(*keys)
-    except Exception as e:
-        print(f"Cache clear warning: {e}")
-
-    return stats
+    info = result.info
+    if isinstance(info, Exception):
+        info = str(info)
+    return JsonResponse({"task_id": task_id, "status": result.status, "info": info})
 
 @csrf_exempt
 def upload_json_view(request):
@@ -483,7 +640,8 @@ def upload_json_view(request):
                 for file in files:                  
                     uploaded_files[file.name] = file
         
-        stats = process_json_upload(json_data, uploaded_files) 
+        stats = process_json_upload(json_data, uploaded_files, on_batch=build_face_crops.delay)
+        data_changed()
         
         return JsonResponse({
             'success': True,
@@ -492,4 +650,98 @@ def upload_json_view(request):
     except ValidationError as e:
         return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        return JsonResponse({'error': f'Unexpected error: {str(e)}'}, status=500)
\ No newline at end of file
+        return JsonResponse({'error': f'Unexpected error: {str(e)}'}, status=500)
+
+
+@csrf_exempt
+def upload_archive_view(request):
+    """
+    Import one ZIP or tar archive with the upload JSON and its images.
+    A tar body (application/x-tar, optionally gzip/bz2/xz compressed) is read
+    straight from the request stream; ZIP needs a seekable file and is
+    accepted as the multipart field `archive`.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST allowed'}, status=405)
+
+    try:
+        if request.content_type.startswith('multipart/'):
+            archive = request.FILES.get('archive')
+            if not archive:
+                return JsonResponse({'error': 'No archive found'}, status=400)
+            stats = import_upload_archive(archive, on_batch=build_face_crops.delay)
+        else:
+            stats = import_upload_archive(request, on_batch=build_face_crops.delay)
+        data_changed()
+
+        return JsonResponse({
+            'success': True,
+            'stats': stats
+        })
+    except ValidationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': f'Unexpected error: {str(e)}'}, status=500)
+
+
+@csrf_exempt
+def upload_session_create(request):
+    """
+    Start a resumable upload: stage the JSON, then send files in chunks.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST allowed'}, status=405)
+
+    try:
+        json_file = request.FILES.get('json')
+        if not json_file:
+            return JsonResponse({'error': 'No JSON file found'}, status=400)
+
+        session_id, files = create_upload_session(json.loads(json_file.read()))
+        return JsonResponse({'session_id': session_id, 'files': files}, status=201)
+    except (ValidationError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+def upload_session_detail(request, session_id):
+    """
+    GET reports the bytes received per file, POST appends one chunk with
+    form fields filename, offset and total plus the `chunk` file.
+    A mismatching offset answers 409 with the size to resume from.
+    """
+    try:
+        if request.method == 'GET':
+            return JsonResponse({'session_id': session_id, 'files': session_status(session_id)})
+        if request.method != 'POST':
+            return JsonResponse({'error': 'Only GET and POST allowed'}, status=405)
+
+        chunk = request.FILES.get('chunk')
+        filename = request.POST.get('filename')
+        if chunk is None or not filename:
+            return JsonResponse({'error': 'Need filename and chunk'}, status=400)
+        offset = int(request.POST.get('offset', 0))
+        total = int(request.POST['total'])
+
+        received, complete = append_chunk(session_id, filename, offset, total, chunk)
+        status = 200 if complete or received == offset + chunk.size else 409
+        return JsonResponse({'filename': filename, 'received': received, 'complete': complete}, status=status)
+    except (ValidationError, ValueError, KeyError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+def upload_session_commit(request, session_id):
+    """
+    Import the staged files in the background; poll tasks/status/ for progress.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST allowed'}, status=405)
+
+    try:
+        load_manifest(session_id)
+    except ValidationError as e:
+        return JsonResponse({'error': str(e)}, status=404)
+
+    result = import_upload_session.delay(session_id)
+    return JsonResponse({'task_id': result.id, 'status': result.status}, status=202)